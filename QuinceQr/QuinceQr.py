@@ -1,19 +1,34 @@
 import numpy as np
 import matplotlib.pyplot as plt
+import threading
 
 from PIL import Image
-from typing import Callable
 
+from bit_buffer import BitBuffer
 from enumerations import *
 from lookup_tables import ALIGNMENT_PATTERN
+import penalty
 import polynomial_division
+import segmentation
 import util
 
-__all__ = ["QrCode", "ErrorCorrectionLevel"]
+__all__ = ["QrCode", "ErrorCorrectionLevel", "MaskStrategy"]
 
 class QrCode:
 
-    def __init__(self, data: str, error_correction_level: ErrorCorrectionLevel, version: int = 1, force_mask: int = None) -> None:
+    # cache of the layout templates, version -> (function pattern matrix, data module coordinates), see _get_layout_template
+    _layout_templates = {}
+    # cache of the mask planes, version -> (8, size, size) array, see _get_mask_planes
+    _mask_planes = {}
+    # cache of the penalty scoring templates, (version, line step) -> (ScoringTemplate, the 8 packed mask planes), see _get_scoring_template
+    _scoring_templates = {}
+    # cache of the packed format information, (version, error correction level, line step) -> the 8 packed format informations, see _get_format_information_bits
+    _format_information_bits = {}
+    # cache of the masks of MaskStrategy.fixed_heuristic, (version, error correction level) -> mask pattern number, see _get_heuristic_mask
+    _heuristic_masks = {}
+    _layout_templates_lock = threading.Lock()
+
+    def __init__(self, data: str, error_correction_level: ErrorCorrectionLevel, version: int = 1, force_mask: int = None, mask_strategy: MaskStrategy = MaskStrategy.exact) -> None:
         """
         makes a QR-Code
 
@@ -29,6 +44,11 @@ class QrCode:
                 ErrorCorrectionLevel.H = 30% \n
         force_mask: int
             the number of the mask to be applied, when None the best will be used
+        mask_strategy: MaskStrategy
+            how the best mask is chosen (when no mask is forced):
+                MaskStrategy.exact = all the masks are scored \n
+                MaskStrategy.sampled = the masks are scored on some of the rows and columns (faster, but not always the best mask) \n
+                MaskStrategy.fixed_heuristic = the same mask for every QR-Code of a version and error correction level (nothing is scored) \n
 
         Returns
         -------
@@ -38,188 +58,253 @@ class QrCode:
 
         self.data = data
         self.error_correction_level = error_correction_level
+        self.segments = None
         
-        self.qr_code_matrix = self._make_qr_code(version, force_mask=force_mask)
-        
-
+        self.qr_code_matrix = self._make_qr_code(version, force_mask=force_mask, mask_strategy=mask_strategy)
 
-    def _get_mode(self) -> ModeIndicator:
+    @classmethod
+    def batch(cls, payloads: list, error_correction_level: ErrorCorrectionLevel, version: int = 1, force_mask: int = None, mask_strategy: MaskStrategy = MaskStrategy.exact, chunk_size: int = 256) -> list:
         """
-        returns the mode for the specified data
-        will only return numeric, alphanumeric or byte mode, as kanji is not implemented
+        makes many QR-Codes at once, the same as [QrCode(data, error_correction_level, ...) for data in payloads], but with less work per QR-Code
+
+        all payloads are segmented and sized first, then they are grouped by version (all of them have the same error correction level):
+        the error correction, structuring and layout phases run once for every group (in chunks of chunk_size QR-Codes),
+        on the stacked codewords, bits and matrices
+        the encoding phase (segmentation) still runs once per payload, so the gain shrinks with the version:
+        about 2.5-3x for small versions, but hardly any for version 40, where segmenting the text takes most of the time
 
         Parameters
         ----------
-        data : str
-            the text of the QR-Code
+        payloads: list
+            the texts of the QR-Codes
+        chunk_size: int = 256
+            the most QR-Codes, that are made at once (limits the memory of the stacked matrices)
+        the other parameters are the same as for QrCode(...)
 
         Returns
         -------
-        ModeIndicator
-            the ModeIndicator for the mode of the data
+        list
+            the QR-Codes, in the order of the payloads
         """
 
-        if set(self.data).issubset(util.digits): # or use re.match
-            return ModeIndicator.numeric_mode
-        elif set(self.data).issubset(util.alphanumeric):
-            return ModeIndicator.alphanumeric_mode
-        else:
-            return ModeIndicator.byte_mode
-    
+        qr_codes = []
+        # version -> (indices of the payloads, their data codewords)
+        groups = {}
+        for index, data in enumerate(payloads):
+            qr_code = cls.__new__(cls)
+            qr_code.data = data
+            qr_code.error_correction_level = error_correction_level
+            encoded_data_bits = qr_code._encoding_phase(version)
 
-    def _make_character_counter_indicater(self, mode: ModeIndicator):
+            indices, data_codewords = groups.setdefault(qr_code.version, ([], []))
+            indices.append(index)
+            data_codewords.append(encoded_data_bits.to_bytes())
+            qr_codes.append(qr_code)
+
+        for indices, data_codewords in groups.values():
+            for chunk_start in range(0, len(indices), chunk_size):
+                chunk_indices = indices[chunk_start:chunk_start+chunk_size]
+                stacked_data_codewords = np.frombuffer(b"".join(data_codewords[chunk_start:chunk_start+chunk_size]), dtype=np.uint8).reshape(len(chunk_indices), -1)
+
+                # the QR-Codes of a group only differ in their data, any of them can make the stacked matrices
+                qr_code = qr_codes[chunk_indices[0]]
+                bits = qr_code._structuring_phase(*qr_code._error_correction_phase(stacked_data_codewords))
+                matrices = qr_code._layout_phase(bits, force_mask=force_mask, mask_strategy=mask_strategy)
+
+                for index, matrix in zip(chunk_indices, matrices):
+                    qr_codes[index].qr_code_matrix = matrix
+
+        return qr_codes
+
+    def _make_character_counter_indicater(self, mode: ModeIndicator, character_count: int) -> BitBuffer:
         """
-        returns the character_count_indicator of the QR-Code
+        returns the character_count_indicator of a segment
 
         Parameters
         ----------
-        version: int
-            the version of the QR-Code
+        mode: ModeIndicator
+            the mode for the data encoding
+        character_count: int
+            the amount of characters (bytes in byte mode) of the segment
 
         Returns
         -------
-        SizeLevel
-            the size level of the QR-Code
+        BitBuffer
+            the character count, padded to the length required by the version and mode
         """
         pad = util.calculate_character_counter_indicater_pad(self.version, mode)        # get the amount of padding needed
-        return format(len(self.data), f">0{pad}b")                                      # pad the binary to the length specified
+        character_count_indicator = BitBuffer()
+        character_count_indicator.append(character_count, pad)                          # pad the binary to the length specified
+        return character_count_indicator
 
-    def _encode_alphanumeric_mode(self) -> str:
+    def _encode_alphanumeric_mode(self, data: str) -> BitBuffer:
         """
         encode text in alphanumeric mode
+        every pair of characters is encoded as 45*id1 + id2 in 11 bits, a last single character in 6 bits
 
         Parameters
         ----------
+        data: str
+            the text of the segment
 
         Returns
         -------
-        str
+        BitBuffer
             the encoded data
         """
 
-        encoded_data = ""
-        pairs = [self.data[i:i+2] for i in range(0, len(self.data), 2)]
-        
-        for pair in pairs:
-            if len(pair) == 1:
-                val = util.get_char_id(pair)
-                encoded_data += format(val, ">06b")
-                break
-            
-            val1 = util.get_char_id(pair[0])
-            val2 = util.get_char_id(pair[1])
-            pair_val = (45*val1)+val2
-
-            encoded_data += format(pair_val, ">011b")
+        encoded_data = BitBuffer()
+        char_ids = util.get_char_ids(data).astype(np.uint32)
+        num_pairs = len(char_ids) // 2
+
+        pairs = char_ids[:2*num_pairs].reshape(num_pairs, 2)
+        encoded_data.append_values(pairs[:, 0]*45 + pairs[:, 1], 11)
+
+        if len(char_ids) % 2:
+            encoded_data.append(int(char_ids[-1]), 6)
         return encoded_data
 
-    def _encode_numeric_mode(self) -> str:
+    def _encode_numeric_mode(self, data: str) -> BitBuffer:
         """
         encode text in numeric mode
+        every group of 3 digits is encoded as a number in 10 bits, a last group of 2 digits in 7 bits and a single digit in 4 bits
 
         Parameters
         ----------
+        data: str
+            the text of the segment
 
         Returns
         -------
-        str
+        BitBuffer
             the encoded data
         """
 
-        encoded_data = ""
-        pairs = [self.data[i:i+3] for i in range(0, len(self.data), 3)]
+        encoded_data = BitBuffer()
+        digits = np.frombuffer(data.encode("ascii"), dtype=np.uint8).astype(np.uint32) - ord("0")
+        num_groups = len(digits) // 3
 
-        for pair in pairs:
-            if len(pair) == 1 or pair[0:2] == "00":
-                encoded_data += format(int(pair), ">04b")
-            elif len(pair) == 2 or pair[0] == "0":
-                encoded_data += format(int(pair), ">07b")
-            elif len(pair) == 3:
-                encoded_data += format(int(pair), ">010b")
+        groups = digits[:3*num_groups].reshape(num_groups, 3)
+        encoded_data.append_values(groups[:, 0]*100 + groups[:, 1]*10 + groups[:, 2], 10)
+
+        remaining_digits = data[3*num_groups:]
+        if remaining_digits:
+            encoded_data.append(int(remaining_digits), 3*len(remaining_digits)+1)
         return encoded_data
 
-    def _encode_byte_mode(self) -> str:
+    def _encode_byte_mode(self, data: bytes) -> BitBuffer:
         """
         encode text in byte mode
 
         Parameters
         ----------
+        data: bytes
+            the bytes of the segment, iso 8859 latin-1 (Western europe) or utf-8 (after an ECI segment), see segmentation.make_segments
 
         Returns
         -------
-        str
+        BitBuffer
             the encoded data
         """
-        data_bytes = self.data.encode("ISO 8859-1")         # iso 8859 latin-1 (Western europe)
-        # data_bytes = self.data.encode("UTF-8")            # utf-8 (not supported by all readers and does not produce good results for larger QR-Codes)
 
-        encoded_data = "".join(format(byte, "0>8b") for byte in data_bytes)
-        return encoded_data
+        return BitBuffer(data)
 
-    def _encode_kanji_mode(self) -> str:
+    def _encode_kanji_mode(self, data: str) -> BitBuffer:
         raise NotImplementedError
 
-    def _encode_text(self, mode):
+    def _encode_eci_mode(self, assignment_number: int) -> BitBuffer:
+        """
+        encode the ECI designator (only assignment numbers up to 127, which fit into a single byte)
+
+        Parameters
+        ----------
+        assignment_number: int
+            the ECI assignment number, eg. 26 for UTF-8
+
+        Returns
+        -------
+        BitBuffer
+            the encoded data
+        """
+
+        encoded_data = BitBuffer()
+        encoded_data.append(assignment_number, 8)
+        return encoded_data
+
+    def _encode_text(self, mode, data) -> BitBuffer:
         """
         encode text in the given mode
 
         Parameters
         ----------
-        data: str
+        data: str | bytes | int
             the data to be encoded
 
         Returns
         -------
-        str
+        BitBuffer
             the encoded data
         """
         if mode == ModeIndicator.numeric_mode:
-            return self._encode_numeric_mode()
+            return self._encode_numeric_mode(data)
         elif mode == ModeIndicator.alphanumeric_mode:
-            return self._encode_alphanumeric_mode()
+            return self._encode_alphanumeric_mode(data)
         elif mode == ModeIndicator.byte_mode:
-            return self._encode_byte_mode()
+            return self._encode_byte_mode(data)
         elif mode == ModeIndicator.kanji_mode:
-            return self._encode_kanji_mode()
+            return self._encode_kanji_mode(data)
+        elif mode == ModeIndicator.eci_mode:
+            return self._encode_eci_mode(data)
         raise TypeError(f"mode not found: {mode}")
+
+    def _encode_segment(self, segment: segmentation.Segment) -> BitBuffer:
+        """
+        encode a segment: the mode indicator, the character count indicator (not for ECI) and the encoded data
+
+        """
+
+        encoded_segment = BitBuffer()
+        encoded_segment.append(int(util.get_mode_indicator_bits(segment.mode), 2), 4)
+        if segment.mode != ModeIndicator.eci_mode:
+            encoded_segment.extend(self._make_character_counter_indicater(segment.mode, len(segment.data)))
+        encoded_segment.extend(self._encode_text(segment.mode, segment.data))
+        return encoded_segment
         
-    def _add_terminator(self, bit_string: str, total_data_bits_required: int) -> str:
+    def _add_terminator(self, bits: BitBuffer, total_data_bits_required: int) -> BitBuffer:
         """ 
         returns the encoded_data_bits with the terminator appended (just a bunch of zeroes)
 
         """
 
-        length_difference = total_data_bits_required - len(bit_string)
+        length_difference = total_data_bits_required - len(bits)
         terminator_length = min(4, length_difference)
-        return bit_string + "0" * terminator_length
+        bits.append(0, terminator_length)
+        return bits
     
-    def _add_padding(self, bit_string: str) -> str:
+    def _add_padding(self, bits: BitBuffer) -> BitBuffer:
         """ 
-        returns the encoded_data_bits with padding (just a bunch of zeroes)
+        returns the encoded_data_bits with padding (just a bunch of zeroes, up to the next multiple of 8)
 
         """
 
-        pad_length = 8-len(bit_string)%8
-        return  bit_string + "0" * pad_length
+        bits.pad_to_byte()
+        return bits
 
-    def _fill_with_pad_bytes(self, total_bit_string: str, total_data_bits_required: int) -> str:
+    def _fill_with_pad_bytes(self, bits: BitBuffer, total_data_bits_required: int) -> BitBuffer:
         """ 
         fill the encoded_data_bits with the pad_bytes, (alternating '11101100' and '00010001')
 
         """
 
-        pad_byte1, pad_byte2 = "11101100", "00010001"
-
-        while len(total_bit_string) < total_data_bits_required:
-            total_bit_string += pad_byte1
-            pad_byte1, pad_byte2 = pad_byte2, pad_byte1
+        num_pad_bytes = (total_data_bits_required - len(bits)) // 8
+        bits.append_bytes(b"\xec\x11" * (num_pad_bytes // 2) + b"\xec" * (num_pad_bytes % 2))
+        return bits
 
-        return total_bit_string
+    def _encoded_data_to_bits(self, segments: list) -> BitBuffer:
+        encoded_data_bits = BitBuffer()
+        for segment in segments:
+            encoded_data_bits.extend(self._encode_segment(segment))
 
-    def _encoded_data_to_bits(self, mode: ModeIndicator, encoded_data: str) -> str:
-        character_count_indicator = self._make_character_counter_indicater(mode)
-
-        encoded_data_bits = util.get_mode_indicator_bits(mode) + character_count_indicator + encoded_data
         total_number_bits_required = util.get_total_number_codewords(self.version, self.error_correction_level)*8
 
         encoded_data_bits = self._add_terminator(encoded_data_bits, total_number_bits_required)
@@ -228,13 +313,10 @@ class QrCode:
 
         return encoded_data_bits
 
-    def _split_in_groups(self, codewords: list, num_of_blocks_per_group: tuple, num_of_codewords_per_block: tuple) -> list:
+    def _split_in_groups(self, codewords: np.ndarray, num_of_blocks_per_group: tuple, num_of_codewords_per_block: tuple) -> tuple:
         """
-        Sorts a list of codewords into the appropriate groups and blocks
-
-        
-        The codewords need to be sorted into 2 Groups, each containing x and y blocks respectivly
-        In Group 1 each Block contains n codewords, in Group 2 each block contains m codewords
+        Splits the contiguous data codewords into the appropriate groups and blocks (views, without copying them for a single QR-Code)
+        the codewords of many QR-Codes can be split at once: (number of QR-Codes, number of codewords)
 
         The codewords need to be sorted into 2 Groups, each containing 'num_of_blocks_per_group[0]' and 'num_of_blocks_per_group[1]' blocks respectivly
         In Group 1 each Block contains 'num_of_codewords_per_block[0]' codewords, in Group 2 each block contains 'num_of_codewords_per_block[1]' codewords
@@ -246,527 +328,511 @@ class QrCode:
         
         Returns
         -------
-        list
-            codewords sorted into groups
+        tuple
+            (group 1, group 2), the codewords with the shape (..., number of blocks, number of codewords per block), row i is block i
         """
 
-        groups = []
-        for group_index in range(2):
-            group_offset = group_index*num_of_blocks_per_group[0]*num_of_codewords_per_block[0]
-            group = []
-
-            for block_index in range(num_of_blocks_per_group[group_index]):
-                block_offset = block_index*num_of_codewords_per_block[group_index]
-                
-                block = [codewords[group_offset + block_offset + codeword_index_in_block] for codeword_index_in_block in range(num_of_codewords_per_block[group_index])]
-                group.append(block)
-            groups.append(group)
+        group_1_length = num_of_blocks_per_group[0]*num_of_codewords_per_block[0]
+        group_2_length = num_of_blocks_per_group[1]*num_of_codewords_per_block[1]
+        leading_shape = codewords.shape[:-1]
 
-        return groups
+        group_1 = codewords[..., :group_1_length].reshape(*leading_shape, num_of_blocks_per_group[0], num_of_codewords_per_block[0])
+        group_2 = codewords[..., group_1_length:group_1_length+group_2_length].reshape(*leading_shape, num_of_blocks_per_group[1], num_of_codewords_per_block[1])
+        return group_1, group_2
 
-    def _make_error_correction_codewords(self, data_codewords_in_groups: list, generator_polynomial: list) -> list:
+    def _make_error_correction_codewords(self, data_codewords_in_groups: tuple, num_of_error_correction_codewords: int) -> np.ndarray:
         """
         make the error correction codewords
+        all blocks of a group (of all the QR-Codes) are encoded at once with the parity table of their block length, see polynomial_division.encode_blocks
+
+        Returns
+        -------
+        np.ndarray
+            (..., number of blocks, number of error correction codewords per block) uint8 array, row i belongs to block i (group 1 first)
         """
 
         error_correction_codewords_in_groups = []
-
-        # convert data_codewords from binary to integers
-        for group_index, group in enumerate(data_codewords_in_groups):
-            for block_index, block in enumerate(group):
-                data_codewords_in_groups[group_index][block_index] = [int(codeword, 2) for codeword in block]
-
-        # make the error_correction_codewords and arange them into groups and blocks
         for group in data_codewords_in_groups:
-            error_correction_codewords_single_group = []
-            for block in group:
-                error_correction_codewords_single_block = polynomial_division.divide_polynomials(block, generator_polynomial)
-                error_correction_codewords_single_group.append(error_correction_codewords_single_block)
-            error_correction_codewords_in_groups.append(error_correction_codewords_single_group)
+            *leading_shape, num_of_blocks, block_length = group.shape
+            if num_of_blocks == 0:
+                continue
+            error_correction_codewords = polynomial_division.encode_blocks(group.reshape(-1, block_length), num_of_error_correction_codewords)
+            error_correction_codewords_in_groups.append(error_correction_codewords.reshape(*leading_shape, num_of_blocks, num_of_error_correction_codewords))
 
-        return error_correction_codewords_in_groups
+        if len(error_correction_codewords_in_groups) == 1:
+            return error_correction_codewords_in_groups[0]
+        return np.concatenate(error_correction_codewords_in_groups, axis=-2)
 
-    def _all_codewords_to_bits(self, all_codewords: list) -> str:
+    def _all_codewords_to_bits(self, all_codewords: np.ndarray) -> np.ndarray:
         """
-        formats all the codewords to bits again and adds remainder bits
+        unpacks all the codewords to bits (most significant bit first) and adds the remainder bits (zeros)
+
+        Returns
+        -------
+        np.ndarray
+            uint8 array of 0 and 1, one for every data module (..., number of data modules)
         """
 
-        num_remainder_bits = util.get_remainder_bits(self.version)
-        bit_string = ''.join(format(byte, '08b') for byte in all_codewords) + '0'*num_remainder_bits
-        return bit_string
+        num_codeword_bits = all_codewords.shape[-1] * 8
+        bits = np.zeros((*all_codewords.shape[:-1], num_codeword_bits + util.get_remainder_bits(self.version)), dtype=np.uint8)
+        bits[..., :num_codeword_bits] = np.unpackbits(all_codewords, axis=-1)
+        return bits
 
     def _place_finder_patterns(self, matrix: np.ndarray) -> np.ndarray:
         """
-        place the finder patterns in the QR-Code
+        place the finder patterns in the QR-Code (in place)
         """
-        mat = matrix.copy()
 
         finder_pattern_seperator_offsets = [(0, 0), (1, 0), (0, 1)]
         for position, offset in zip(util.calculate_finder_positions(self.version), finder_pattern_seperator_offsets):
-            mat = util.place_pattern(mat, *util.shift_finder_pattern(position, offset), overwrite=False)
-        return mat
+            util.place_pattern(matrix, *util.shift_finder_pattern(position, offset), overwrite=False)
+        return matrix
 
     def _place_alignment_patterns(self, matrix: np.ndarray) -> np.ndarray:
         """
-        place the alignment patterns in the QR-Code
+        place the alignment patterns in the QR-Code (in place)
         """
-        mat = matrix.copy()
         
         for alignment_position in util.get_alignment_positions(self.version):
             upper_left_corner = alignment_position[0]-2, alignment_position[1]-2
-            mat = util.place_pattern(mat, ALIGNMENT_PATTERN, upper_left_corner, overwrite=False)
-        return mat
+            util.place_pattern(matrix, ALIGNMENT_PATTERN, upper_left_corner, overwrite=False)
+        return matrix
 
     def _place_timing_patterns(self, matrix) -> np.ndarray:
         """
-        place the timing patterns in the QR-Code
+        place the timing patterns in the QR-Code (in place)
         """
         
         horizontal, vertical = util.make_timing_patterns(self.version)
-        mat = util.place_pattern(matrix, horizontal, (8, 6))
-        mat = util.place_pattern(mat, vertical, (6, 8))
-        return mat
+        util.place_pattern(matrix, horizontal, (8, 6))
+        util.place_pattern(matrix, vertical, (6, 8))
+        return matrix
     
     def _place_dark_module(self, matrix: np.ndarray) -> np.ndarray:
         """
-        place the dark module in the QR-Code
+        place the dark module in the QR-Code (in place)
         """
         
-        mat = matrix.copy()
         coords = (8, ((4 * self.version) + 9))
-        mat[coords[::-1]] = Module.black
-        return mat
+        matrix[coords[::-1]] = Module.black
+        return matrix
 
     def _reserve_format_information_area(self, matrix: np.ndarray) -> np.ndarray:
         """
-        reserve the area for format information in the QR-Code
+        reserve the area for format information in the QR-Code (in place)
         """
 
-        def top_left():
-            x = 8
-            for y in range(0, 6):
-                mat[y, x] = Module.reserved_for_format_information
-
-            y = 8
-            for x in range(0, 6):
-                mat[y, x] = Module.reserved_for_format_information
-
-            coords = [(8, 8), (7, 8), (8, 7)]
-            for coord in coords:
-                mat[coord] = Module.reserved_for_format_information
-
-        def top_right():
-            y = 8
-            for x in range(size-8, size):
-                mat[y, x] = Module.reserved_for_format_information
-        
-        def bottom_left():
-            x = 8
-            for y in range(size-7, size):
-                mat[y, x] = Module.reserved_for_format_information
-        
-        mat = matrix.copy()
-        size = util.calc_qr_size(self.version)
-
-        top_left()
-        top_right()
-        bottom_left()
-        return mat
+        matrix[util.get_format_information_coordinates(self.version)] = Module.reserved_for_format_information
+        return matrix
 
     def _reserve_version_information_area(self, matrix: np.ndarray) -> np.ndarray:
         """
-        reserve the area for version information in the QR-Code (for version 7 and above)
+        reserve the area for version information in the QR-Code (for version 7 and above, in place)
         """
 
-        size = util.calc_qr_size(self.version)
-
-        # top right
-        pattern = np.full((3, 6), fill_value=Module.reserved_for_version_information)
-        upper_left_corner = (0, size-11)
-        mat = util.place_pattern(matrix, pattern, upper_left_corner)
-
-        # bottom left
-        pattern = np.full((6, 3), fill_value=Module.reserved_for_version_information)
-        upper_left_corner = (size-11, 0)
-        mat = util.place_pattern(mat, pattern, upper_left_corner)
-        
-        return mat
+        matrix[util.get_version_information_coordinates(self.version)] = Module.reserved_for_version_information
+        return matrix
 
     def _place_function_patterns(self, matrix: np.ndarray) -> np.ndarray:
         """
-        place all the required function patterns in the QR-Code
+        place all the required function patterns in the QR-Code (in place)
         """
 
-        mat = self._place_finder_patterns(matrix)
+        self._place_finder_patterns(matrix)
 
         if self.version >= 2:
-            mat = self._place_alignment_patterns(mat)
+            self._place_alignment_patterns(matrix)
 
-        mat = self._place_timing_patterns(mat)
-        mat = self._place_dark_module(mat)
-        mat = self._reserve_format_information_area(mat)
+        self._place_timing_patterns(matrix)
+        self._place_dark_module(matrix)
+        self._reserve_format_information_area(matrix)
 
         if self.version >= 7:
-            mat = self._reserve_version_information_area(mat)
+            self._reserve_version_information_area(matrix)
 
-        return mat
+        return matrix
     
-    def _fill_qr_code(self, bit_string: str, matrix: np.ndarray) -> np.ndarray:
+    def _make_data_module_coordinates(self, matrix: np.ndarray) -> tuple:
         """
-        fill the QR-Code with the bits/modules
-        """
-
-        def data_bytes_iterator(data):
-            # temp = 0
-            for bit in data:
-                # temp += 1
-                yield Module.data_black if bit == '1' else Module.data_white
-
-            raise Exception("you should never have come here, but now that you are here ...")
-            # print("you should never have come here, but now that you are here ...") # TODO
-            # print(f"{temp=}")
-            # # raise ...
-            # while True:
-            #     yield Module.black
+        returns the coordinates of all the empty modules (after placing the function patterns), in the order the data bits are placed
 
-        bits = data_bytes_iterator(bit_string)
+        Returns
+        -------
+        tuple
+            (row indices, column indices), both as int arrays
+        """
 
+        size = util.calc_qr_size(self.version)
         mat = np.rot90(matrix)
+        coordinates = []
 
         y = 0
         direction = -1 # start with placing modules from right to left
         while y < len(mat)-1:
             # skip the timing pattern, we should arrive here after a full completion of 2 rows ...
-            if y == util.calc_qr_size(self.version)-7:
-                # print(f"skipping a row:") # TODO: remove
-                # pp_mat([mat[y]])
+            if y == size-7:
                 y +=1
 
             for x in range(len(mat[0]))[::direction]:
                 # only fill in data, if the area is not already filled, otherwise skip ...
                 if mat[y, x] == Module.empty:
-                    mat[y, x] = next(bits)
+                    coordinates.append((y, x))
                 if mat[y+1, x] == Module.empty:
-                    mat[y+1, x] = next(bits)
+                    coordinates.append((y+1, x))
 
             y+=2
             direction *= -1 # reverse the module placing direction
 
-        return np.rot90(mat, k=-1)
+        # undo the rotation: mat[y, x] is matrix[x, size-1-y]
+        rotated_rows, rotated_columns = np.array(coordinates).T
+        return rotated_columns, size-1-rotated_rows
+
+    def _get_layout_template(self) -> tuple:
+        """
+        returns the (cached) layout template for the version of the QR-Code, it is made once per version and shared between all QR-Codes (and threads)
+
+        Returns
+        -------
+        tuple
+            (matrix with all the function patterns placed, (row indices, column indices) of the data modules in placement order),
+            the arrays are read-only
+        """
+
+        template = QrCode._layout_templates.get(self.version)
+        if template is not None:
+            return template
+
+        with QrCode._layout_templates_lock:
+            if self.version not in QrCode._layout_templates:
+                size = util.calc_qr_size(self.version)
+                matrix = self._place_function_patterns(np.full((size, size), Module.empty, dtype=module_dtype))
+                data_module_coordinates = self._make_data_module_coordinates(matrix)
+
+                for array in (matrix, *data_module_coordinates):
+                    array.flags.writeable = False
+                QrCode._layout_templates[self.version] = matrix, data_module_coordinates
+
+        return QrCode._layout_templates[self.version]
+
+    def _get_mask_planes(self) -> np.ndarray:
+        """
+        returns the (cached) mask planes for the version of the QR-Code, made once per version and shared like the layout template
+
+        Returns
+        -------
+        np.ndarray
+            read-only (8, size, size) array: 1 where the mask toggles a data module, 0 everywhere else (including all function patterns),
+            as Module.data_white ^ 1 == Module.data_black, a mask is applied with a single XOR
+        """
+
+        mask_planes = QrCode._mask_planes.get(self.version)
+        if mask_planes is not None:
+            return mask_planes
+
+        template, _ = self._get_layout_template()
+        with QrCode._layout_templates_lock:
+            if self.version not in QrCode._mask_planes:
+                data_modules = template == Module.empty
+                mask_planes = (util.make_mask_patterns(len(template)) & data_modules).astype(module_dtype)
+                mask_planes.flags.writeable = False
+                QrCode._mask_planes[self.version] = mask_planes
+
+        return QrCode._mask_planes[self.version]
+
+    def _fill_qr_code(self, bits: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """
+        fill the QR-Code with the bits/modules (in place)
+        the bits are placed at the data module coordinates of the layout template (the cached placement order), all at once
+        (stacked matrices (..., size, size) are filled with the stacked bits (..., number of data modules))
+        """
+
+        _, (rows, columns) = self._get_layout_template()
+
+        if bits.shape[-1] != len(rows):
+            raise ValueError(f"the amount of bits ({bits.shape[-1]}) does not match the amount of data modules ({len(rows)})")
+
+        # Module.data_white + 1 == Module.data_black
+        matrix[..., rows, columns] = np.add(bits, Module.data_white, dtype=module_dtype)
+        return matrix
     
     def _place_version_information_string(self, matrix: np.ndarray) -> np.ndarray:
         """
-        place the version information string into the QR-Code, for versions above 6
-        there are potetial conflicts with the order of Module placement in the bottom left, as one source used a wrong (?) order! (But this algorithm should be inline with the QR-Code standard)
+        place the version information string into the QR-Code, for versions above 6 (in place)
+        (both copies at once, see util.get_version_information_coordinates for the order of the modules)
         """
 
-        if not 6 < self.version < 41:
-            raise ValueError(f"version must be in range 6 < version < 41, not {self.version}")
+        bits = util.get_version_information_bits(self.version)
+        rows, columns = util.get_version_information_coordinates(self.version)
 
-        def version_information_string_generator(version_information_string: str):
-            for bit in version_information_string:
-                yield Module.white if bit == '0' else Module.black
-            raise Exception("outside of bounds!!!")
+        matrix[..., rows, columns] = np.where(bits, Module.black, Module.white).astype(module_dtype)
+        return matrix
+    
+    def _apply_mask(self, matrix: np.ndarray, mask_pattern_num: int) -> np.ndarray:
+        """
+        applies a given mask on the QR-Code (toggles the data modules where the mask pattern is set, in place)
+        (stacked matrices (number of QR-Codes, size, size) take an array of mask pattern numbers, one for each)
+        """
 
-        mat = matrix.copy()
-        size = util.calc_qr_size(self.version)
-        version_information_string = util.get_version_information_string(self.version)
-
-        # top_right
-        data = version_information_string_generator(version_information_string)
-        for row_index in reversed(range(0, 6)):
-            for index in reversed(range(size-11, size-8)):
-                mat[row_index, index] = next(data)
-
-        # bottom_left orig (this is apparently incorrect !!)
-        # data = version_information_string_generator(version_information_string)
-        # for index in range(0, 6):
-        #     for row_index in range(size-11, size-8):
-        #         mat[row_index, index] = next(data)
-
-        # bottom_left reversed on x and y (this seems to be the correct way!!)
-        data = version_information_string_generator(version_information_string)
-        for index in reversed(range(0, 6)):
-            for row_index in reversed(range(size-11, size-8)):
-                mat[row_index, index] = next(data)
-        
-        return mat
+        return np.bitwise_xor(matrix, self._get_mask_planes()[mask_pattern_num], out=matrix)
     
-    def _apply_mask(self, matrix: np.ndarray, pattern_formula: Callable[[int, int], bool]):
+    def _get_scoring_template(self, line_step: int = 1) -> tuple:
         """
-        applies a given mask on the QR-Code
+        returns the (cached) penalty scoring template for the version of the QR-Code, made once per version and shared like the layout template
+        the function patterns and the version information are the same for all 8 masks, so their part of the penalty is only computed once
+        (with a line step above 1 the template is sampled, see penalty.make_scoring_template)
+
+        Returns
+        -------
+        tuple
+            (penalty.ScoringTemplate, the 8 mask planes packed with penalty.pack_matrices)
         """
 
-        mat = matrix.copy()
+        key = (self.version, line_step)
+        scoring_template = QrCode._scoring_templates.get(key)
+        if scoring_template is not None:
+            return scoring_template
 
-        for (row_index, index), value in np.ndenumerate(mat):
-            if pattern_formula(row_index, index):
-                # toggle the module
-                if value == Module.data_black:
-                    mat[row_index, index] = Module.data_white
-                elif value == Module.data_white:
-                    mat[row_index, index] = Module.data_black
-                # if value == 1.:                         # TODO REMOVE
-                #     mat[row_index, index] = 0           # TODO REMOVE
+        template, _ = self._get_layout_template()
+        mask_planes = self._get_mask_planes()
+        with QrCode._layout_templates_lock:
+            if key not in QrCode._scoring_templates:
+                fixed = self._place_version_information_string(template.copy()) if self.version >= 7 else template
+                variable = (template == Module.empty) | (template == Module.reserved_for_format_information)
 
-        return mat
-    
-    def _evaluation_condition_1(self, matrix: np.ndarray) -> int:
-        """ 
-        returns the penalty for evaluation condition #1 (chains of same colored modules)
-        """
-
-        penalty = 0
-
-        # horizontal
-        for row_index in range(len(matrix)):
-            last_module = None
-            consecutive_chain_len = 1
-            for index in range(len(matrix[0])):
-                current_module = matrix[row_index, index]
-                if last_module is None:
-                    last_module = current_module
-                elif last_module == current_module:
-                    consecutive_chain_len += 1
-                else:
-                    if consecutive_chain_len >= 5:
-                        penalty += consecutive_chain_len -2
-
-                    last_module = current_module
-                    consecutive_chain_len = 1
-
-            if consecutive_chain_len >= 5:
-                penalty += consecutive_chain_len -2
-
-        # vertical
-        for index in range(len(matrix)):
-            last_module = None
-            consecutive_chain_len = 1
-            for row_index in range(len(matrix[0])):
-                current_module = matrix[row_index, index]
-                if last_module is None:
-                    last_module = current_module
-                elif last_module == current_module:
-                    consecutive_chain_len += 1
-                else:
-                    if consecutive_chain_len >= 5:
-                        penalty += consecutive_chain_len -2
-
-                    last_module = current_module
-                    consecutive_chain_len = 1
-
-            if consecutive_chain_len >= 5:
-                penalty += consecutive_chain_len -2
-
-        return penalty
-    
-    def _evaluation_squares_patterns_ratio(self, matrix: np.ndarray) -> int:
-        """ 
-        returns the penaly for evaluation condition #2 (squares), #3 (patterns) and #4 (ratio)
+                scoring_template = penalty.make_scoring_template(fixed == Module.black, variable, line_step)
+                QrCode._scoring_templates[key] = scoring_template, penalty.pack_matrices(mask_planes.astype(bool), scoring_template.line_indices)
+
+        return QrCode._scoring_templates[key]
+
+    def _get_format_information_bits(self, line_step: int = 1) -> list:
+        """
+        returns the (cached) format information of the 8 masks, packed with penalty.pack_matrices (only the dark format information modules are set)
         """
 
-        mat = matrix.copy()
+        key = (self.version, self.error_correction_level, line_step)
+        format_information_bits = QrCode._format_information_bits.get(key)
+        if format_information_bits is not None:
+            return format_information_bits
 
-        penalty = 0
+        scoring_template, _ = self._get_scoring_template(line_step)
+        with QrCode._layout_templates_lock:
+            if key not in QrCode._format_information_bits:
+                size = scoring_template.size
+                rows, columns = util.get_format_information_coordinates(self.version)
+                format_informations = np.zeros((len(util.masking_conditions), size, size), dtype=bool)
+                for index, format_information in enumerate(format_informations):
+                    format_information[rows, columns] = util.get_format_information_bits(self.error_correction_level, index)
+                QrCode._format_information_bits[key] = penalty.pack_matrices(format_informations, scoring_template.line_indices)
 
-        num_total_modules = np.product(mat.shape)
-        num_black_modules = 0
+        return QrCode._format_information_bits[key]
 
-        for (row_index, index), value in np.ndenumerate(mat):
+    def _find_best_masks(self, matrices: np.ndarray, line_step: int = 1) -> np.ndarray:
+        """
+        returns the mask with the least amount of bad patterns (lowest penalty) for each of the stacked matrices (number of QR-Codes, size, size),
+        each candidate is scored with its format information
+        the candidates are made from the packed data modules, only the windows with data or format information modules are scored,
+        and a candidate is abandoned as soon as its penalty reaches the best one so far
+        (with a line step above 1 only some of the rows and columns are scored, see MaskStrategy.sampled)
+        """
 
-            if value == Module.black:
-                num_black_modules += 1
+        scoring_template, mask_bits = self._get_scoring_template(line_step)
+        format_information_bits = self._get_format_information_bits(line_step)
+        masked_format_information_bits = [mask ^ format_information for mask, format_information in zip(mask_bits, format_information_bits)]
 
-            square = mat[row_index:row_index+2, index:index+2]
-            if square.shape == (2, 2) and square[0, 0] == square[0, 1] == square[1, 0] == square[1, 1]:
-            # if not(index+2 > len(mat[0]) or row_index+2 > len(mat)):
-                penalty += 3
-                # print(f"hit: {row_index, index=}")
-            
-            row = mat[row_index, index:index+11]
-            if row.shape == (11,) and np.array_equal(row, util.evaluation_condition3_pattern):
-                # print(f"WooW! {row_index, index=}")
-                penalty += 40
-                
-            col = mat[row_index:row_index+11, index]
-            if col.shape == (11,) and np.array_equal(col, util.evaluation_condition3_pattern):
-                # print(f"here! {row_index, index=}")
-                penalty += 40
+        mask_pattern_nums = []
+        for data_bits in penalty.pack_matrices(matrices == Module.data_black, scoring_template.line_indices):
+            # the data, format information and mask bits never overlap (the mask only covers data modules)
+            candidates = [scoring_template.fixed_dark_bits | (data_bits ^ masked_format_information) for masked_format_information in masked_format_information_bits]
+            index, _ = penalty.find_best_mask(scoring_template, candidates)
+            mask_pattern_nums.append(index)
 
-        floor_div_res = int((num_black_modules/num_total_modules*100) // 5)
-        ratio_penalty = int(min(abs(floor_div_res*5 - 50)/5, abs(floor_div_res*5 - 45)/5) * 10)
+        return np.array(mask_pattern_nums)
 
-        return penalty + ratio_penalty
-    
-    def _calculate_penalty(self, matrix: np.ndarray) -> int:
-        return self._evaluation_condition_1(matrix) + self._evaluation_squares_patterns_ratio(matrix)
+    def _apply_best_mask(self, matrix: np.ndarray, line_step: int = 1) -> tuple:
+        """
+        applies the mask with the least amount of bad patterns (lowest penalty, the mask is applied in place), see _find_best_masks
+        """
+
+        index = int(self._find_best_masks(matrix[np.newaxis], line_step)[0])
+        return self._apply_mask(matrix, index), index
 
-    def _apply_best_mask(self, matrix: np.ndarray) -> tuple:
+    def _get_heuristic_mask(self) -> int:
         """
-        tries to figure out the mask with the least amount of bad patterns (lowest penalty)
-        (currently broken; but applying any mask will provide a working QR-Code ...)
+        returns the (cached) mask of MaskStrategy.fixed_heuristic for the version and error correction level of the QR-Code:
+        the best mask for pseudo random data, so only the function patterns and the format information are taken into account
         """
 
-        penalties = []
-        matrices = []
+        key = (self.version, self.error_correction_level)
+        mask_pattern_num = QrCode._heuristic_masks.get(key)
+        if mask_pattern_num is not None:
+            return mask_pattern_num
 
-        for index, mask_pattern in enumerate(util.masking_conditions):
-            mat = self._apply_mask(matrix, mask_pattern)
-            penalty = self._calculate_penalty(mat)
-            penalties.append(penalty)
-            matrices.append(mat)
-            # print(f"{index, penalty}")
-        
-        index = np.argmin(penalties)
+        template, data_module_coordinates = self._get_layout_template()
+        matrix = template.copy()
+        if self.version >= 7:
+            self._place_version_information_string(matrix)
+        random_bits = np.random.default_rng(self.version).random(len(data_module_coordinates[0])) < 0.5
+        matrix[data_module_coordinates] = np.where(random_bits, Module.data_black, Module.data_white).astype(module_dtype)
 
-        # print(f"{penalties=}")  # TODO: remove
-        # print(f"{index=}")      # TODO: remove
-        
-        return matrices[index], index
+        _, mask_pattern_num = self._apply_best_mask(matrix)
+        with QrCode._layout_templates_lock:
+            return QrCode._heuristic_masks.setdefault(key, mask_pattern_num)
     
-    def _place_format_information_string(self, matrix: np.ndarray, mask_pattern_num: int) -> np.ndarray:
+    def _choose_masks(self, matrices: np.ndarray, force_mask: int = None, mask_strategy: MaskStrategy = MaskStrategy.exact) -> tuple:
         """
-        places the format information string into the QR-Code
+        applies the forced mask, or the masks chosen by the mask strategy, to the stacked matrices (number of QR-Codes, size, size) (in place)
+
+        Returns
+        -------
+        tuple
+            (masked matrices, mask pattern numbers)
         """
 
-        format_information_string = util.get_format_information_string(self.error_correction_level, mask_pattern_num)
-        mat = matrix.copy()
+        if force_mask is not None:
+            mask_pattern_nums = np.full(len(matrices), force_mask)
+        elif mask_strategy == MaskStrategy.fixed_heuristic:
+            mask_pattern_nums = np.full(len(matrices), self._get_heuristic_mask())
+        elif mask_strategy == MaskStrategy.sampled:
+            mask_pattern_nums = self._find_best_masks(matrices, penalty.SAMPLED_LINE_STEP)
+        else:
+            mask_pattern_nums = self._find_best_masks(matrices)
 
-        def format_information_string_generator(format_information_string: str):
-            for bit in format_information_string:
-                yield Module.white if bit == '0' else Module.black
-            raise Exception("outside of bounds!!!")
+        return self._apply_mask(matrices, mask_pattern_nums), mask_pattern_nums
 
-        data = format_information_string_generator(format_information_string)
+    def _choose_mask(self, matrix: np.ndarray, force_mask: int = None, mask_strategy: MaskStrategy = MaskStrategy.exact) -> tuple:
+        """
+        applies the forced mask, or the mask chosen by the mask strategy (in place)
 
-        index = 8
-        for row_index in reversed(range(len(mat))):
-            if mat[row_index, index] == Module.reserved_for_format_information:
-                mat[row_index, index] = next(data)
-        
-        data = format_information_string_generator(format_information_string)
-        
-        row_index = 8
-        for index in range(len(mat)):
-            if mat[row_index, index] == Module.reserved_for_format_information:
-                mat[row_index, index] = next(data)
+        Returns
+        -------
+        tuple
+            (masked matrix, mask pattern number)
+        """
+
+        _, mask_pattern_nums = self._choose_masks(matrix[np.newaxis], force_mask, mask_strategy)
+        return matrix, int(mask_pattern_nums[0])
 
-        return mat
+    def _place_format_information_string(self, matrix: np.ndarray, mask_pattern_num: int) -> np.ndarray:
+        """
+        places the format information string into the QR-Code (in place)
+        (both copies at once, see util.get_format_information_coordinates for the order of the modules)
+        stacked matrices (..., size, size) take mask pattern numbers of the shape (...)
+        """
+
+        bits = np.array([util.get_format_information_bits(self.error_correction_level, num) for num in np.ravel(mask_pattern_num)])
+        rows, columns = util.get_format_information_coordinates(self.version)
+
+        # (..., 1, 15), the same bits for both copies
+        bits = bits.reshape(*np.shape(mask_pattern_num), 1, bits.shape[-1])
+        matrix[..., rows, columns] = np.where(bits, Module.black, Module.white).astype(module_dtype)
+        return matrix
 
     def _unify_blacks_and_whites(self, matrix: np.ndarray) -> np.ndarray:
         """
-        consolidata Module.data_black and Module.data_white into just Module.black and Module.white
+        consolidata Module.data_black and Module.data_white into just Module.black and Module.white (in place)
+        as Module.data_white ^ 7 == Module.white and Module.data_black ^ 7 == Module.black, this is a single XOR on the data modules
         """
 
-        mat = matrix.copy()
-        mat = np.where(mat == Module.data_black, Module.black, mat) # type:ignore
-        mat = np.where(mat == Module.data_white, Module.white, mat) # type:ignore
-        return mat
+        return np.bitwise_xor(matrix, 7, out=matrix, where=matrix >= Module.data_white)
 
-    def _encoding_phase(self, requested_minimum_version) -> str:
+    def _encoding_phase(self, requested_minimum_version) -> BitBuffer:
         """
         the encoding phase of QR-Code generation
         """
 
-        mode = self._get_mode()
-
+        # split the data into the segments (numeric, alphanumeric, byte) with the least amount of bits, for the smallest possible version
         if requested_minimum_version is None:
-            self.version = util.get_qr_code_version(len(self.data), mode, self.error_correction_level)
+            self.segments, self.version = segmentation.make_segments_for_smallest_version(self.data, self.error_correction_level)
         else:
-            self.version = util.get_qr_code_version(len(self.data), mode, self.error_correction_level, requested_minimum_version)
+            self.segments, self.version = segmentation.make_segments_for_smallest_version(self.data, self.error_correction_level, requested_minimum_version)
 
-        encoded_data = self._encode_text(mode)
-        encoded_data_bits = self._encoded_data_to_bits(mode, encoded_data)
+        encoded_data_bits = self._encoded_data_to_bits(self.segments)
 
         return encoded_data_bits
 
-    def _error_correction_phase(self, encoded_data_bits: str) -> tuple:
+    def _error_correction_phase(self, data_codewords: np.ndarray) -> tuple:
         """
         the error correction phase of QR-Code generation
+        data_codewords are the contiguous uint8 data codewords (block after block), or the stacked ones of many QR-Codes (number of QR-Codes, number of codewords)
+
+        Returns
+        -------
+        tuple
+            (data codewords, error correction codewords): the data codewords
+            and the (..., number of blocks, number of error correction codewords per block) uint8 error correction codewords
         """
         
-        codewords = util.split_string_into_chunks(encoded_data_bits, 8)
-        assert all(len(codeword) == 8 for codeword in codewords) # TODO: remove
-        
         num_of_blocks_per_group = util.get_blocks_per_group(self.version, self.error_correction_level)
         num_of_codewords_per_block = util.get_codewords_per_block(self.version, self.error_correction_level)
-        data_codewords_in_groups = self._split_in_groups(codewords, num_of_blocks_per_group, num_of_codewords_per_block)
+        data_codewords_in_groups = self._split_in_groups(data_codewords, num_of_blocks_per_group, num_of_codewords_per_block)
 
         num_of_error_correction_codewords = util.get_error_correction_codewords_per_block(self.version, self.error_correction_level)
-        generator_polynomial = polynomial_division.make_generator_polynomial(num_of_error_correction_codewords)
-        
-        error_correction_codewords_in_groups = self._make_error_correction_codewords(data_codewords_in_groups, generator_polynomial)
+        error_correction_codewords = self._make_error_correction_codewords(data_codewords_in_groups, num_of_error_correction_codewords)
 
-        return data_codewords_in_groups, error_correction_codewords_in_groups
+        return data_codewords, error_correction_codewords
 
-    def _structuring_phase(self, data_codewords_in_groups: list, error_correction_codewords_in_groups: list) -> str:
+    def _structuring_phase(self, data_codewords: np.ndarray, error_correction_codewords: np.ndarray) -> np.ndarray:
         """
         the structuring phase of QR-Code generation
         """
         
-        num_of_blocks_per_group = util.get_blocks_per_group(self.version, self.error_correction_level)
+        # all codewords block after block, the interleave permutation puts them into their final order
+        codewords = np.concatenate((data_codewords, error_correction_codewords.reshape(*data_codewords.shape[:-1], -1)), axis=-1)
+        all_codewords = codewords[..., util.get_interleave_permutation(self.version, self.error_correction_level)]
 
-        # interweave if there is more than one block
-        # => interweave if there are just blocks in group 1
-        if sum(num_of_blocks_per_group) > 1:
-            all_codewords = util.interweave_codewords(data_codewords_in_groups) + util.interweave_codewords(error_correction_codewords_in_groups)
-        else:
-            # else just use 1 block:
-            all_codewords = data_codewords_in_groups[0][0] + error_correction_codewords_in_groups[0][0]
-
-        bit_string = self._all_codewords_to_bits(all_codewords)
-        return bit_string
+        bits = self._all_codewords_to_bits(all_codewords)
+        return bits
 
-    def _layout_phase(self, bit_string: str, force_mask: int = None, border_size: int = 3) -> np.ndarray:
+    def _layout_phase(self, bits: np.ndarray, force_mask: int = None, mask_strategy: MaskStrategy = MaskStrategy.exact, border_size: int = 3) -> np.ndarray:
         """
         layout the matrix for the QR-Code and place all the Modules within the matrix
+        (a single matrix is allocated, every step changes it in place)
 
         Parameters
         ----------
-        bit-string: str
-            the string of bits to be placed in the matrix
+        bits: np.ndarray
+            the bits to be placed in the matrix (0 and 1, one for every data module),
+            or the stacked bits of many QR-Codes (number of QR-Codes, number of data modules), that are laid out together
         force_mask: int = None
             when provided, forces a certain mask to be used. (needs to be in range 0..7 (both inclusive))
+        mask_strategy: MaskStrategy = MaskStrategy.exact
+            how the best mask is chosen, when no mask is forced
         border_size: int = 3
             when provided, makes a white perimeter around the QR-Code (mesured in Modules from one side to the QR-Code)
         
         """
 
-        size = util.calc_qr_size(self.version)
-        matrix = np.full((size, size), Module.empty)
-
-        matrix = self._place_function_patterns(matrix)
-        
-        matrix = self._fill_qr_code(bit_string, matrix)
+        template, _ = self._get_layout_template()
+        size = len(template)
+        bordered_size = size+border_size*2
+        stacked_bits = bits.reshape(-1, bits.shape[-1])
 
-        if self.version >= 7:
-            matrix = self._place_version_information_string(matrix)
+        # the only buffer: the QR-Codes with their border, all the steps work in place on the views of the QR-Codes inside the border
+        bordered_matrices = np.full((len(stacked_bits), bordered_size, bordered_size), fill_value=Module.white, dtype=module_dtype)
+        matrices = bordered_matrices[:, border_size:border_size+size, border_size:border_size+size]
+        matrices[...] = template
 
-        if force_mask is None:
-            # FIXME: this method seems to be faulty ...
-            matrix, mask_pattern_num = self._apply_best_mask(matrix)
-        else:
-            mask_pattern = util.masking_conditions[force_mask]
-            matrix = self._apply_mask(matrix, mask_pattern)
+        self._fill_qr_code(stacked_bits, matrices)
 
-            mask_pattern_num = force_mask
+        if self.version >= 7:
+            self._place_version_information_string(matrices)
 
-        matrix = self._place_format_information_string(matrix, mask_pattern_num)
-        matrix = self._unify_blacks_and_whites(matrix)
+        _, mask_pattern_nums = self._choose_masks(matrices, force_mask, mask_strategy)
 
-        matrix = util.place_pattern(np.full((matrix.shape[0]+border_size*2, matrix.shape[1]+border_size*2), fill_value=Module.white), pattern=matrix, upper_left_corner=(3, 3))
+        self._place_format_information_string(matrices, mask_pattern_nums)
+        self._unify_blacks_and_whites(matrices)
 
-        return matrix
+        return bordered_matrices.reshape(*bits.shape[:-1], bordered_size, bordered_size)
 
-    def _make_qr_code(self, requested_minimum_version: int, force_mask: int = None):
+    def _make_qr_code(self, requested_minimum_version: int, force_mask: int = None, mask_strategy: MaskStrategy = MaskStrategy.exact):
         """
         compute the QR-Code
         """
 
         encoded_data_bits = self._encoding_phase(requested_minimum_version)
-        data_codewords_in_groups, error_correction_codewords_in_groups = self._error_correction_phase(encoded_data_bits)
-        bit_string = self._structuring_phase(data_codewords_in_groups, error_correction_codewords_in_groups)
-        matrix = self._layout_phase(bit_string, force_mask=force_mask)
+        data_codewords, error_correction_codewords = self._error_correction_phase(np.frombuffer(encoded_data_bits.to_bytes(), dtype=np.uint8))
+        bits = self._structuring_phase(data_codewords, error_correction_codewords)
+        matrix = self._layout_phase(bits, force_mask=force_mask, mask_strategy=mask_strategy)
 
         return matrix
 
@@ -792,10 +858,9 @@ class QrCode:
         make the QR-Code data matrix into an pillow image
         """
 
-        rgb_matrix = np.empty((*self.qr_code_matrix.shape, 3), dtype=np.uint8)
-
-        for (row_index, col_index), value in np.ndenumerate(self.qr_code_matrix):
-            rgb_matrix[row_index, col_index] = np.array([0, 0, 0]) if value == Module.black else np.array([255, 255, 255])
+        # black modules become (0, 0, 0), everything else (255, 255, 255)
+        gray_matrix = np.where(self.qr_code_matrix == Module.black, 0, 255).astype(np.uint8)
+        rgb_matrix = np.repeat(gray_matrix[:, :, None], 3, axis=2)
 
         img = Image.fromarray(rgb_matrix)
         img = img.resize((image_size, image_size), resample=Image.Resampling.NEAREST)
@@ -0,0 +1,145 @@
+import time
+
+import numpy as np
+
+from enumerations import *
+from QuinceQr import QrCode
+import lookup_tables
+import penalty
+
+
+def make_payloads(version: int, error_correction_level: ErrorCorrectionLevel, num_payloads: int, seed: int = 0) -> list:
+    """
+    returns random lowercase texts (byte mode), that fill the given version almost completely
+    """
+
+    # 4 bits mode indicator, up to 16 bits character count indicator and the terminator
+    num_characters = lookup_tables.data_bit_capacities[error_correction_level][version-1] // 8 - 3
+    random_generator = np.random.default_rng(seed)
+    return ["".join(random_generator.choice(list("abcdefghijklmnopqrstuvwxyz"), num_characters)) for _ in range(num_payloads)]
+
+def get_penalty(qr_code: QrCode) -> int:
+    """
+    returns the penalty of the finished QR-Code (without the border)
+    """
+
+    matrix = qr_code.qr_code_matrix[3:-3, 3:-3]
+    return int(penalty.calculate_penalties(matrix == Module.black)[0])
+
+def get_unmasked_matrix(qr_code: QrCode) -> np.ndarray:
+    """
+    returns the matrix of the QR-Code right before the mask is chosen (data modules and version information placed)
+    """
+
+    data_codewords = np.frombuffer(qr_code._encoded_data_to_bits(qr_code.segments).to_bytes(), dtype=np.uint8)
+    bits = qr_code._structuring_phase(*qr_code._error_correction_phase(data_codewords))
+    template, _ = qr_code._get_layout_template()
+    matrix = qr_code._fill_qr_code(bits, template.copy())
+    if qr_code.version >= 7:
+        qr_code._place_version_information_string(matrix)
+    return matrix
+
+def benchmark_mask_strategies(versions: tuple = (1, 2, 5, 10, 20, 30, 40), error_correction_level: ErrorCorrectionLevel = ErrorCorrectionLevel.M, num_payloads: int = 20, repeat: int = 5) -> list:
+    """
+    compares the mask strategies against MaskStrategy.exact: the time of choosing the mask and the penalty of the finished QR-Code
+    (the penalty is a proxy for how well the QR-Code scans, the lower the better)
+
+    Returns
+    -------
+    list
+        one dict per version and strategy: version, strategy, milliseconds per mask choice, time saved (ms), mean penalty increase (%), best mask found (%)
+    """
+
+    results = []
+    for version in versions:
+        payloads = make_payloads(version, error_correction_level, num_payloads, seed=version)
+
+        penalties = {}
+        milliseconds = {}
+        for mask_strategy in MaskStrategy:
+            qr_codes = [QrCode(payload, error_correction_level, version=version, mask_strategy=mask_strategy) for payload in payloads]
+            penalties[mask_strategy] = np.array([get_penalty(qr_code) for qr_code in qr_codes])
+
+            # the templates are cached by now, only the mask choice itself is timed (best of several runs)
+            matrices = [get_unmasked_matrix(qr_code) for qr_code in qr_codes]
+            timings = []
+            for _ in range(repeat):
+                # the mask is applied in place
+                matrix_copies = [matrix.copy() for matrix in matrices]
+                start = time.perf_counter()
+                for qr_code, matrix in zip(qr_codes, matrix_copies):
+                    qr_code._choose_mask(matrix, mask_strategy=mask_strategy)
+                timings.append((time.perf_counter() - start) * 1000 / num_payloads)
+            milliseconds[mask_strategy] = min(timings)
+
+        exact = penalties[MaskStrategy.exact]
+        for mask_strategy in MaskStrategy:
+            results.append({
+                "version": version,
+                "strategy": mask_strategy.name,
+                "mask ms": milliseconds[mask_strategy],
+                "saved ms": milliseconds[MaskStrategy.exact] - milliseconds[mask_strategy],
+                "penalty +%": float(np.mean((penalties[mask_strategy] - exact) / exact) * 100),
+                "best mask %": float(np.mean(penalties[mask_strategy] == exact) * 100)
+            })
+
+    return results
+
+def benchmark_batch(versions: tuple = (1, 2, 5, 10, 20, 40), error_correction_level: ErrorCorrectionLevel = ErrorCorrectionLevel.M, num_payloads: int = 200, repeat: int = 3) -> list:
+    """
+    compares QrCode.batch against making the QR-Codes one at a time (the caches are warmed up before timing),
+    for payloads of a single version and for all the versions mixed together
+    (measured: about 2.5-3x for versions 1-10, 1.6x for version 20 and only about 1.05x for version 40,
+    since the per payload segmentation dominates there; the mixed default versions come out at about 1.7x)
+
+    Returns
+    -------
+    list
+        one dict per version (version "mixed" for all of them): version, milliseconds per QR-Code one at a time and with QrCode.batch, speedup
+    """
+
+    payloads_per_version = {version: make_payloads(version, error_correction_level, num_payloads, seed=version) for version in versions}
+    mixed_payloads = [payload for payloads in payloads_per_version.values() for payload in payloads[:num_payloads // len(versions)]]
+    np.random.default_rng(0).shuffle(mixed_payloads)
+
+    results = []
+    for version, payloads in (*payloads_per_version.items(), ("mixed", mixed_payloads)):
+        QrCode.batch(payloads[:1], error_correction_level)
+
+        single_timings, batch_timings = [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            qr_codes = [QrCode(payload, error_correction_level) for payload in payloads]
+            single_timings.append((time.perf_counter() - start) * 1000 / len(payloads))
+
+            start = time.perf_counter()
+            batch_qr_codes = QrCode.batch(payloads, error_correction_level)
+            batch_timings.append((time.perf_counter() - start) * 1000 / len(payloads))
+
+        # both make the same QR-Codes
+        assert all(np.array_equal(qr_code.qr_code_matrix, batch_qr_code.qr_code_matrix) for qr_code, batch_qr_code in zip(qr_codes, batch_qr_codes))
+
+        results.append({
+            "version": version,
+            "single ms": min(single_timings),
+            "batch ms": min(batch_timings),
+            "speedup": min(single_timings) / min(batch_timings)
+        })
+
+    return results
+
+def print_results(results: list) -> None:
+    columns = list(results[0])
+    print(" | ".join(f"{column:>15}" for column in columns))
+    for result in results:
+        print(" | ".join(f"{value:>15.2f}" if isinstance(value, float) else f"{value:>15}" for value in result.values()))
+
+
+def main():
+    print_results(benchmark_mask_strategies())
+    print()
+    print_results(benchmark_batch())
+
+
+if __name__ == "__main__":
+    main()
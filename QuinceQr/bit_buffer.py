@@ -0,0 +1,202 @@
+import numpy as np
+
+
+class BitBuffer:
+    """
+    a growing sequence of bits, used instead of '0'/'1' strings while encoding the data
+
+    the complete bytes are stored in a bytearray, the last (up to 7) bits, that don't make up a whole byte yet,
+    are kept in a small integer until the byte is complete
+    """
+
+    __slots__ = ("_bytes", "_pending", "_pending_length")
+
+    def __init__(self, data: bytes = b"") -> None:
+        """
+        Initializes a new BitBuffer, optionally starting with whole bytes
+
+        """
+
+        self._bytes = bytearray(data)
+        self._pending = 0
+        self._pending_length = 0
+
+    def __len__(self) -> int:
+        return len(self._bytes)*8 + self._pending_length
+
+    def __iter__(self):
+        """
+        iterates over the bits (as the integers 0 and 1), most significant bit of every byte first
+        """
+
+        for byte in self._bytes:
+            for shift in range(7, -1, -1):
+                yield (byte >> shift) & 1
+        for shift in range(self._pending_length-1, -1, -1):
+            yield (self._pending >> shift) & 1
+
+    def __str__(self) -> str:
+        return "".join(format(byte, "08b") for byte in self._bytes) + (format(self._pending, f"0{self._pending_length}b") if self._pending_length else "")
+
+    def __repr__(self) -> str:
+        return f"BitBuffer('{self}')"
+
+    def __eq__(self, other: "BitBuffer") -> bool:
+        return isinstance(other, BitBuffer) and self._bytes == other._bytes and self._pending_length == other._pending_length and self._pending == other._pending
+
+    def append(self, value: int, number_of_bits: int) -> None:
+        """
+        appends the lowest 'number_of_bits' bits of value, most significant bit first
+
+        Parameters
+        ----------
+        value: int
+            the value to be appended, must fit into number_of_bits bits
+        number_of_bits: int
+            the amount of bits to append
+        """
+
+        if value < 0 or value >> number_of_bits:
+            raise ValueError(f"the value does not fit into {number_of_bits} bits: {value}")
+
+        pending = (self._pending << number_of_bits) | value
+        pending_length = self._pending_length + number_of_bits
+
+        while pending_length >= 8:
+            pending_length -= 8
+            self._bytes.append((pending >> pending_length) & 0xFF)
+
+        self._pending = pending & ((1 << pending_length) - 1)
+        self._pending_length = pending_length
+
+    def append_values(self, values: np.ndarray, number_of_bits: int) -> None:
+        """
+        appends many values at once, each one with the same amount of bits (most significant bit first)
+
+        Parameters
+        ----------
+        values: np.ndarray
+            1d array of non-negative integers, each must fit into number_of_bits bits
+        number_of_bits: int
+            the amount of bits per value
+        """
+
+        values = np.asarray(values, dtype=np.uint32)
+        if len(values) == 0:
+            return
+        if values.max() >> number_of_bits:
+            raise ValueError(f"the values do not fit into {number_of_bits} bits: {values.max()}")
+
+        # one row of bits per value
+        shifts = np.arange(number_of_bits-1, -1, -1, dtype=np.uint32)
+        bits = ((values[:, None] >> shifts) & 1).astype(np.uint8).ravel()
+
+        if self._pending_length:
+            pending_shifts = np.arange(self._pending_length-1, -1, -1)
+            bits = np.concatenate((((self._pending >> pending_shifts) & 1).astype(np.uint8), bits))
+
+        num_whole_bits = len(bits) // 8 * 8
+        self._bytes += np.packbits(bits[:num_whole_bits]).tobytes()
+
+        self._pending = 0
+        self._pending_length = len(bits) - num_whole_bits
+        for bit in bits[num_whole_bits:].tolist():
+            self._pending = (self._pending << 1) | bit
+
+    def append_bytes(self, data: bytes) -> None:
+        """
+        appends whole bytes (8 bits each)
+        when the buffer doesn't end on a byte boundary, all the bytes are shifted at once as a single integer:
+        the pending bits go in front, the last pending_length bits of the bytes are pending afterwards
+        """
+
+        if self._pending_length == 0:
+            self._bytes += data
+            return
+        if not data:
+            return
+
+        merged = (self._pending << (8*len(data))) | int.from_bytes(data, "big")
+        self._bytes += (merged >> self._pending_length).to_bytes(len(data), "big")
+        self._pending = merged & ((1 << self._pending_length) - 1)
+
+    def extend(self, other: "BitBuffer") -> None:
+        """
+        appends all the bits of another BitBuffer
+        """
+
+        self.append_bytes(other._bytes)
+        if other._pending_length:
+            self.append(other._pending, other._pending_length)
+
+    def pad_to_byte(self) -> None:
+        """
+        appends zeros until the length is a multiple of 8 (nothing is appended, if it already is)
+        """
+
+        if self._pending_length:
+            self.append(0, 8 - self._pending_length)
+
+    def to_bytes(self) -> bytes:
+        """
+        returns the bits as bytes, an incomplete last byte is filled up with zeros
+        """
+
+        if self._pending_length:
+            return bytes(self._bytes) + bytes([self._pending << (8 - self._pending_length)])
+        return bytes(self._bytes)
+
+
+def main():
+    bits = BitBuffer()
+    bits.append(0b0010, 4)
+    bits.append(11, 9)
+    assert str(bits) == "0010000001011" and len(bits) == 13
+    assert list(bits) == [0, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 1, 1]
+
+    bits.append_bytes(b"\xff")
+    assert str(bits) == "001000000101111111111"
+    assert bits.to_bytes() == bytes([0b00100000, 0b01011111, 0b11111000])
+
+    bits.pad_to_byte()
+    assert len(bits) == 24
+    bits.pad_to_byte()
+    assert len(bits) == 24
+
+    other = BitBuffer(b"\x01")
+    other.append(1, 1)
+    bits.extend(other)
+    assert str(bits)[24:] == "000000011"
+
+    values = BitBuffer()
+    values.append(1, 3)
+    values.append_values(np.array([5, 1023, 0]), 10)
+    single = BitBuffer()
+    single.append(1, 3)
+    for value in (5, 1023, 0):
+        single.append(value, 10)
+    assert values == single
+
+    # append_bytes(...) on an unaligned buffer is the same as appending the bytes one at a time
+    data = bytes(range(256)) * 3
+    for pending_length in range(8):
+        bulk, single = BitBuffer(), BitBuffer()
+        for buffer in (bulk, single):
+            buffer.append(0b1010101 & ((1 << pending_length) - 1), pending_length)
+        bulk.append_bytes(data)
+        for byte in data:
+            single.append(byte, 8)
+        assert bulk == single and len(bulk) == pending_length + 8*len(data)
+        bulk.append_bytes(b"")
+        assert bulk == single
+
+    try:
+        bits.append(4, 2)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("appending a value that doesn't fit should raise")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
-from enum import Enum, auto
+import numpy as np
+
+from enum import Enum, IntEnum, auto
 
 class ErrorCorrectionLevel(Enum):
     L = 1
@@ -11,13 +13,30 @@ class ModeIndicator(Enum):
     alphanumeric_mode = 1
     byte_mode = 2
     kanji_mode = 3
+    eci_mode = 4
+
+class MaskStrategy(Enum):
+    """
+    how the mask of the QR-Code is chosen, when no mask is forced
+    """
+
+    # all 8 masks are scored on the whole symbol (ISO/IEC 18004)
+    exact = auto()
+    # the masks are scored on some of the rows and columns
+    sampled = auto()
+    # one mask per version and error correction level, chosen once without looking at the data
+    fixed_heuristic = auto()
 
 class SizeLevel(Enum):
     small = auto()
     medium = auto()
     large = auto()
 
-class Module(Enum):
+class Module(IntEnum):
+    """
+    the modules of the QR-Code matrix, stored as uint8 values (module_dtype) in the matrix
+    """
+
     empty = auto()
     black = auto()
     white = auto()
@@ -25,3 +44,6 @@ class Module(Enum):
     data_black = auto()
     reserved_for_format_information = auto()
     reserved_for_version_information = auto()
+
+# the dtype of the QR-Code matrix, that holds the Module values
+module_dtype = np.uint8
@@ -0,0 +1,87 @@
+import numpy as np
+
+# Galois Field
+MODULO = 0b100011101
+
+
+def _make_alpha_integer_tables() -> tuple:
+    """
+    builds the tables for converting between alpha- and integer-notation ('2**alpha = integer')
+
+    alpha_to_integer_table[alpha] = integer (doubled in length, so that the sum of two alphas needs no modulo)
+    integer_to_alpha_table[integer] = alpha (integer=0 has no alpha and maps to None)
+    """
+
+    alpha_to_integer_table = [1] * 510
+    integer_to_alpha_table = [None] * 256
+
+    for alpha in range(1, 255):
+        integer = alpha_to_integer_table[alpha-1] * 2
+        if integer >= 256:
+            integer ^= MODULO
+        alpha_to_integer_table[alpha] = integer
+
+    for alpha in range(255):
+        integer_to_alpha_table[alpha_to_integer_table[alpha]] = alpha
+        alpha_to_integer_table[alpha+255] = alpha_to_integer_table[alpha]
+
+    return alpha_to_integer_table, integer_to_alpha_table
+
+def _make_multiplication_table() -> tuple:
+    """
+    builds the full 256x256 multiplication table, one bytes object per row
+
+    multiplication_table[a][b] = a*b
+    """
+
+    rows = [bytes(256)]
+    for a in range(1, 256):
+        alpha_a = integer_to_alpha_table[a]
+        rows.append(bytes([0] + [alpha_to_integer_table[alpha_a + integer_to_alpha_table[b]] for b in range(1, 256)]))
+    return tuple(rows)
+
+
+alpha_to_integer_table, integer_to_alpha_table = _make_alpha_integer_tables()
+multiplication_table = _make_multiplication_table()
+# the multiplication table as a (256, 256) uint8 array, for multiplying whole arrays at once: multiplication_matrix[a, b] = a*b
+multiplication_matrix = np.frombuffer(b"".join(multiplication_table), dtype=np.uint8).reshape(256, 256)
+
+
+def multiply(a: int, b: int) -> int:
+    """
+    multiplies two numbers in GF(256) (integer-notation)
+
+    """
+
+    return multiplication_table[a][b]
+
+def add(a: int, b: int) -> int:
+    """
+    adds two numbers in GF(256) (integer-notation), equivalent to bitwise XOR
+
+    """
+
+    return a ^ b
+
+
+def main():
+    # alpha_to_integer_table / integer_to_alpha_table
+    assert alpha_to_integer_table[:10] == [1, 2, 4, 8, 16, 32, 64, 128, 29, 58]
+    assert integer_to_alpha_table[:10] == [None, 0, 1, 25, 2, 50, 26, 198, 3, 223]
+    assert alpha_to_integer_table[255:265] == alpha_to_integer_table[:10]
+
+    # multiply(...)
+    assert multiply(5, 5) == 17
+    assert multiply(0, 123) == multiply(123, 0) == 0
+    assert all(multiply(1, b) == b for b in range(256))
+    assert all(multiply(a, b) == multiply(b, a) for a in range(256) for b in range(256))
+
+    # multiplication_matrix
+    assert multiplication_matrix[5, 5] == 17 and multiplication_matrix.shape == (256, 256)
+
+    # add(...)
+    assert add(5, 5) == 0
+
+
+if __name__ == "__main__":
+    main()
@@ -429,6 +429,23 @@ error_correction_table = {
     (40, ErrorCorrectionLevel.H): (1276, 30, 20, 15, 61, 16)
 }
 
+# the flat lookup tables below are indexed by [version-1, error_correction_level.value-1, ...] (read-only)
+
+# error_correction_table as a (40, 4, 6) array
+error_correction_array = np.array([[error_correction_table[version, error_correction_level] for error_correction_level in ErrorCorrectionLevel] for version in range(1, 41)], dtype=np.int16)
+
+# version_dict as a (40, 4, 4) array of the character capacities, the last index is the ModeIndicator value (numeric, alphanumeric, byte, kanji)
+character_capacity_array = np.array([[version[error_correction_level] for error_correction_level in ErrorCorrectionLevel] for version in version_dict], dtype=np.int16)
+
+# the amount of data bits as a (40, 4) array
+data_bit_capacity_array = error_correction_array[:, :, 0].astype(np.int32) * 8
+
+# the amount of data bits per version (index: version-1), for each error correction level (increasing with the version)
+data_bit_capacities = {
+    error_correction_level: data_bit_capacity_array[:, error_correction_level.value-1].tolist()
+    for error_correction_level in ErrorCorrectionLevel
+}
+
 remainder_bits_table = [0, 7, 7, 7, 7, 7, 0, 0, 0, 0, 0, 0, 0, 3, 3, 3, 3, 3, 3, 3, 4, 4, 4, 4, 4, 4, 4, 3, 3, 3, 3, 3, 3, 3, 0, 0, 0, 0, 0, 0]
 
 alignment_pattern_locations_table = {
@@ -545,6 +562,12 @@ version_information_string = {
     40: '101000110001101001'
 }
 
+# the format and version information strings as bool arrays (True for a dark module), bit i is character i of the string
+format_information_bits = {key: np.array([bit == "1" for bit in string]) for key, string in format_information_string.items()}
+version_information_bits = {version: np.array([bit == "1" for bit in string]) for version, string in version_information_string.items()}
+for bits in (*format_information_bits.values(), *version_information_bits.values()):
+    bits.flags.writeable = False
+
 char_count_byte_length_for_version_and_mode = {
     SizeLevel.small : {
         ModeIndicator.numeric_mode : 10,
@@ -566,11 +589,32 @@ char_count_byte_length_for_version_and_mode = {
     }
 }
 
+# the versions in each SizeLevel (the length of the character count indicators is the same for all of them)
+size_level_versions = {
+    SizeLevel.small: range(1, 10),
+    SizeLevel.medium: range(10, 27),
+    SizeLevel.large: range(27, 41)
+}
+
+# char_count_byte_length_for_version_and_mode as a (40, 4) array, indexed by [version-1, ModeIndicator value] (read-only)
+character_count_indicator_length_array = np.array([
+    [char_count_byte_length_for_version_and_mode[size_level][mode] for mode in (ModeIndicator.numeric_mode, ModeIndicator.alphanumeric_mode, ModeIndicator.byte_mode, ModeIndicator.kanji_mode)]
+    for size_level, versions in size_level_versions.items() for _ in versions
+], dtype=np.int8)
+
+for array in (error_correction_array, character_capacity_array, data_bit_capacity_array, character_count_indicator_length_array):
+    array.flags.writeable = False
+
+# nested lists of the same tables, indexing these is faster for single lookups (the util getters)
+error_correction_rows = error_correction_array.tolist()
+character_count_indicator_length_rows = character_count_indicator_length_array.tolist()
+
 mode_indicator_mapping = {
     ModeIndicator.numeric_mode: "0001", 
     ModeIndicator.alphanumeric_mode: "0010", 
     ModeIndicator.byte_mode: "0100", 
-    ModeIndicator.kanji_mode: "1000"
+    ModeIndicator.kanji_mode: "1000",
+    ModeIndicator.eci_mode: "0111"
 }
 
 FINDER_PATTERN = np.array(
@@ -582,7 +626,8 @@ FINDER_PATTERN = np.array(
         [Module.black, Module.white, Module.black, Module.black, Module.black, Module.white, Module.black],
         [Module.black, Module.white, Module.white, Module.white, Module.white, Module.white, Module.black],
         [Module.black, Module.black, Module.black, Module.black, Module.black, Module.black, Module.black]
-    ]
+    ],
+    dtype=module_dtype
 )
 
 ALIGNMENT_PATTERN = np.array(
@@ -592,7 +637,8 @@ ALIGNMENT_PATTERN = np.array(
         [Module.black, Module.white, Module.black, Module.white, Module.black],
         [Module.black, Module.white, Module.white, Module.white, Module.black],
         [Module.black, Module.black, Module.black, Module.black, Module.black]
-    ]
+    ],
+    dtype=module_dtype
 )
 
 def main():
@@ -614,6 +660,13 @@ def main():
     version_information_string_file = load_pickle_file("resources/version_information_string.pickle")
     assert version_information_string_file == version_information_string, "version_information_string is not correct"
 
+    # the flat lookup tables
+    for (version, error_correction_level), error_correction_info in error_correction_table.items():
+        assert error_correction_array[version-1, error_correction_level.value-1].tolist() == list(error_correction_info)
+        assert character_capacity_array[version-1, error_correction_level.value-1].tolist() == version_dict[version-1][error_correction_level]
+    assert character_count_indicator_length_array.shape == (40, 4)
+    assert character_count_indicator_length_array[9].tolist() == [12, 11, 16, 10]
+
     # print(error_correction_table[1, ErrorCorrectionLevel.M])
 
 if __name__ == "__main__":
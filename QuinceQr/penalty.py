@@ -0,0 +1,475 @@
+import math
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+
+# penalty weights (ISO/IEC 18004, 7.8.3.1)
+N1 = 3
+N2 = 3
+N3 = 40
+N4 = 10
+
+# the 1:1:3:1:1 (dark:light:dark:light:dark) finder like pattern
+FINDER_LIKE_PATTERN = np.array([1, 0, 1, 1, 1, 0, 1], dtype=bool)
+
+# the line step of the sampled mask strategy (see make_scoring_template), 2 of every SAMPLED_LINE_STEP rows and columns are scored
+SAMPLED_LINE_STEP = 6
+
+# cache of the templates for calculate_penalties_bit_packed, size -> ScoringTemplate, see get_full_scoring_template
+_full_scoring_templates = {}
+
+
+def penalty_runs(dark: np.ndarray) -> np.ndarray:
+    """
+    returns the penalty for evaluation condition #1 (runs of 5 or more modules of the same color in a row or column)
+    N1 + (length-5) for each run
+
+    Parameters
+    ----------
+    dark: np.ndarray
+        (number of matrices, size, size) bool array, True for dark modules
+
+    Returns
+    -------
+    np.ndarray
+        the penalty of each matrix
+    """
+
+    num_matrices, size, _ = dark.shape
+    # rows of all the matrices, then the columns of all the matrices
+    lines = np.concatenate((dark, dark.transpose(0, 2, 1)), axis=1)
+
+    # mark the start of every run and the end of every line, the distance between two marks is the length of a run
+    boundaries = np.ones((num_matrices, 2*size, size+1), dtype=bool)
+    boundaries[:, :, 1:-1] = lines[:, :, 1:] != lines[:, :, :-1]
+    positions = np.flatnonzero(boundaries)
+    run_lengths = np.diff(positions)
+
+    # (the distance between the end of a line and the start of the next one is 1, which is never penalized)
+    long_runs = run_lengths >= 5
+    matrix_indices = positions[:-1][long_runs] // (2*size*(size+1))
+    return np.bincount(matrix_indices, weights=N1 + run_lengths[long_runs] - 5, minlength=num_matrices).astype(int)
+
+def penalty_blocks(dark: np.ndarray) -> np.ndarray:
+    """
+    returns the penalty for evaluation condition #2 (2x2 blocks of the same color, overlapping blocks are all counted)
+    N2 for each block
+
+    """
+
+    top_left, top_right = dark[:, :-1, :-1], dark[:, :-1, 1:]
+    bottom_left, bottom_right = dark[:, 1:, :-1], dark[:, 1:, 1:]
+    same_color = (top_left == top_right) & (top_left == bottom_left) & (top_left == bottom_right)
+    return N2 * same_color.sum(axis=(1, 2))
+
+def penalty_finder_like_patterns(dark: np.ndarray) -> np.ndarray:
+    """
+    returns the penalty for evaluation condition #3 (1:1:3:1:1 patterns in a row or column, with 4 light modules before or after them)
+    N3 for each pattern, the area outside of the symbol counts as light (quiet zone)
+
+    """
+
+    num_matrices, size, _ = dark.shape
+    lines = np.concatenate((dark, dark.transpose(0, 2, 1)), axis=1)
+
+    # surround the lines with the light quiet zone
+    padded = np.zeros((num_matrices, 2*size, size+8), dtype=bool)
+    padded[:, :, 4:-4] = lines
+
+    # window start positions 0 .. size-7 (in the unpadded line)
+    num_windows = size - 6
+
+    def shifted(offset: int) -> np.ndarray:
+        # the module 'offset' modules after the window start (offset is relative to the unpadded line)
+        return padded[:, :, 4+offset:4+offset+num_windows]
+
+    pattern = np.ones((num_matrices, 2*size, num_windows), dtype=bool)
+    for offset, is_dark in enumerate(FINDER_LIKE_PATTERN):
+        pattern &= shifted(offset) if is_dark else ~shifted(offset)
+
+    light_before = np.ones_like(pattern)
+    light_after = np.ones_like(pattern)
+    for offset in range(4):
+        light_before &= ~shifted(offset-4)
+        light_after &= ~shifted(offset+7)
+
+    return N3 * (pattern & (light_before | light_after)).sum(axis=(1, 2))
+
+def penalty_balance(dark: np.ndarray) -> np.ndarray:
+    """
+    returns the penalty for evaluation condition #4 (proportion of dark modules)
+    N4 for every full 5% the proportion deviates from 50%
+
+    """
+
+    num_modules = dark.shape[1] * dark.shape[2]
+    num_dark = dark.sum(axis=(1, 2))
+    return N4 * (np.abs(20*num_dark - 10*num_modules) // num_modules)
+
+def calculate_penalties_vectorized(dark: np.ndarray) -> np.ndarray:
+    """
+    returns the total penalty (all 4 evaluation conditions) for each of the (number of matrices, size, size) matrices,
+    computed on the whole stack at once with numpy
+
+    not used to choose masks (the bit packed implementation is faster for every version), kept as the reference
+    that calculate_penalties_bit_packed and the scoring templates are checked against
+    """
+
+    return penalty_runs(dark) + penalty_blocks(dark) + penalty_finder_like_patterns(dark) + penalty_balance(dark)
+
+class ScoringTemplate(NamedTuple):
+    """
+    the precomputed part of the bit packed penalty of all the matrices of one size, which only differ in their variable modules
+    (e.g. all the masked candidates of one version: the function patterns are the same for all of them)
+
+    every line (first the rows, then the columns) is packed into a slot of size+8 bits, the line is in the middle,
+    with 4 light bits on each side (the quiet zone), see pack_matrices
+
+    a sampled template only packs some of the lines (pairs of neighbouring rows and columns), the penalty of the sampled windows
+    is weighted up, so that it estimates the penalty of the whole matrix
+
+    Attributes:
+        size (int): the size of the matrices (in modules)
+        line_indices (tuple): the indices of the packed rows (and columns)
+        slot_width (int): the amount of bits per line
+        all_slots (int): all the bits of all the slots
+        lines (int): the bits of the modules (without the quiet zone)
+        block_starts (int): the bits, where a 2x2 block (to the right and below) starts
+        fixed_dark_bits (int): the dark fixed modules
+        fixed_num_dark (int): the amount of dark fixed modules
+        fixed_penalty (int): the penalty (conditions #1 to #3) of the windows, that only contain fixed modules
+        variable_windows (tuple): the window starts (run windows, run ends, blocks, patterns), that contain a variable module
+        variable_rows (int): the variable modules in the rows
+        window_weight (int): the weight of the penalties for conditions #1 to #3 (size / packed lines, as a fraction with balance_weight)
+        balance_weight (int): the weight of the penalty for condition #4 (1 unless the template is sampled)
+    """
+
+    size: int
+    line_indices: tuple
+    slot_width: int
+    all_slots: int
+    lines: int
+    block_starts: int
+    fixed_dark_bits: int
+    fixed_num_dark: int
+    fixed_penalty: int
+    variable_windows: tuple
+    variable_rows: int
+    window_weight: int = 1
+    balance_weight: int = 1
+
+
+def pack_matrices(dark: np.ndarray, line_indices: Optional[tuple] = None) -> list:
+    """
+    returns every (size, size) matrix of the stack as a single integer, with the rows and columns in slots (see ScoringTemplate)
+    bit (slot*slot width + 4 + index) is set for a dark module
+
+    Parameters
+    ----------
+    dark: np.ndarray
+        (number of matrices, size, size) bool array, True for dark modules
+    line_indices: tuple = None
+        when provided, only these rows and columns are packed (see ScoringTemplate.line_indices)
+    """
+
+    num_matrices, size, _ = dark.shape
+    if line_indices is None or len(line_indices) == size:
+        rows, columns = dark, dark.transpose(0, 2, 1)
+    else:
+        rows, columns = dark[:, line_indices], dark.transpose(0, 2, 1)[:, line_indices]
+    num_lines = rows.shape[1]
+
+    padded = np.zeros((num_matrices, 2*num_lines, size+8), dtype=bool)
+    padded[:, :num_lines, 4:-4] = rows
+    padded[:, num_lines:, 4:-4] = columns
+
+    packed = np.packbits(padded.reshape(num_matrices, -1), axis=1, bitorder="little")
+    return [int.from_bytes(matrix.tobytes(), "little") for matrix in packed]
+
+def make_scoring_template(fixed_dark: np.ndarray, variable: np.ndarray, line_step: int = 1) -> ScoringTemplate:
+    """
+    makes the ScoringTemplate for matrices, that only differ in the variable modules
+
+    Parameters
+    ----------
+    fixed_dark: np.ndarray
+        (size, size) bool array, True for the dark fixed modules (the variable modules are ignored)
+    variable: np.ndarray
+        (size, size) bool array, True for the modules that differ between the matrices
+    line_step: int = 1
+        when above 1, only the pairs of lines (index, index+1) for every line_step-th index are packed (a sampled template)
+    """
+
+    size = len(variable)
+    line_indices = tuple(index for index in range(size) if index % line_step < 2)
+    num_lines = len(line_indices)
+
+    slot_width = size + 8
+    line = ((1 << size) - 1) << 4
+
+    all_slots = (1 << (2*num_lines*slot_width)) - 1
+    lines = sum(line << (slot*slot_width) for slot in range(2*num_lines))
+    rows = sum(line << (slot*slot_width) for slot in range(num_lines))
+    # every row (followed by its neighbour in the next slot) and every column except the last one
+    block_starts = sum((line >> 1 & line) << (slot*slot_width) for slot in range(num_lines-1) if line_indices[slot+1] == line_indices[slot] + 1)
+
+    variable_bits, fixed_dark_bits = pack_matrices(np.stack((variable, fixed_dark & ~variable)), line_indices)
+    fixed = all_slots & ~variable_bits
+
+    # the windows, that only read fixed modules (the quiet zone is fixed too)
+    fixed_run_windows = fixed & fixed >> 1 & fixed >> 2 & fixed >> 3 & fixed >> 4
+    fixed_run_ends = fixed_run_windows & fixed >> 5
+    fixed_blocks = fixed & fixed >> 1 & fixed >> slot_width & fixed >> (slot_width+1)
+    fixed_patterns = fixed
+    for shift in range(1, 11):
+        fixed_patterns &= fixed >> shift
+    for shift in range(1, 5):
+        fixed_patterns &= fixed << shift
+    fixed_windows = (fixed_run_windows, fixed_run_ends, fixed_blocks, fixed_patterns)
+
+    template = ScoringTemplate(
+        size=size,
+        line_indices=line_indices,
+        slot_width=slot_width,
+        all_slots=all_slots,
+        lines=lines,
+        block_starts=block_starts,
+        fixed_dark_bits=fixed_dark_bits,
+        fixed_num_dark=(fixed_dark_bits & rows).bit_count(),
+        fixed_penalty=0,
+        variable_windows=tuple(all_slots & ~windows for windows in fixed_windows),
+        variable_rows=variable_bits & rows,
+        window_weight=size // math.gcd(size, num_lines),
+        balance_weight=num_lines // math.gcd(size, num_lines)
+    )
+
+    fixed_penalty = _add_window_penalties(fixed_dark_bits, template, fixed_windows, 0)
+    return template._replace(fixed_penalty=fixed_penalty)
+
+def _add_window_penalties(dark_bits: int, template: ScoringTemplate, windows: tuple, penalty: int, bound: Optional[int] = None) -> Optional[int]:
+    """
+    adds the penalties for conditions #1 to #3 to penalty, only counting the windows, that start at the given bits
+    returns None as soon as the penalty reaches the bound
+    """
+
+    run_windows, run_ends, blocks, patterns = windows
+    light_bits = ~dark_bits & template.all_slots
+
+    # condition #1: a run of length >= 5 contains (length-4) windows of 5 equal modules, N1 + (length-5) = windows + 2 per run
+    for bits in (dark_bits, light_bits & template.lines):
+        same = bits & bits >> 1 & bits >> 2 & bits >> 3 & bits >> 4
+        ends = same & ~(same >> 1)
+        penalty += template.window_weight * ((same & run_windows).bit_count() + 2 * (ends & run_ends).bit_count())
+        if bound is not None and penalty >= bound:
+            return None
+
+    # condition #2: the rows against the next row (one slot further)
+    same_vertical = ~(dark_bits ^ dark_bits >> template.slot_width)
+    same_blocks = same_vertical & same_vertical >> 1 & ~(dark_bits ^ dark_bits >> 1) & template.block_starts
+    penalty += template.window_weight * N2 * (same_blocks & blocks).bit_count()
+    if bound is not None and penalty >= bound:
+        return None
+
+    # condition #3: 1011101 with 4 light modules before (lower bits) or after (higher bits)
+    finder_like = dark_bits & light_bits >> 1 & dark_bits >> 2 & dark_bits >> 3 & dark_bits >> 4 & light_bits >> 5 & dark_bits >> 6
+    light_before = light_bits << 1 & light_bits << 2 & light_bits << 3 & light_bits << 4
+    light_after = light_bits >> 7 & light_bits >> 8 & light_bits >> 9 & light_bits >> 10
+    penalty += template.window_weight * N3 * (finder_like & (light_before | light_after) & patterns).bit_count()
+    if bound is not None and penalty >= bound:
+        return None
+
+    return penalty
+
+def score_bit_packed(dark_bits: int, template: ScoringTemplate, bound: Optional[int] = None) -> Optional[int]:
+    """
+    returns the total penalty (all 4 evaluation conditions) of a packed matrix (see pack_matrices),
+    only the windows with variable modules are scored, the rest is taken from the template
+
+    Parameters
+    ----------
+    dark_bits: int
+        the packed matrix, its fixed modules must be the ones of the template
+    template: ScoringTemplate
+        the template of the matrix
+    bound: int = None
+        when provided, the scoring is abandoned (and None is returned) as soon as the penalty reaches the bound
+    """
+
+    num_modules = len(template.line_indices) * template.size
+    num_dark = template.fixed_num_dark + (dark_bits & template.variable_rows).bit_count()
+    penalty = template.fixed_penalty + template.balance_weight * N4 * (abs(20*num_dark - 10*num_modules) // num_modules)
+    if bound is not None and penalty >= bound:
+        return None
+
+    return _add_window_penalties(dark_bits, template, template.variable_windows, penalty, bound)
+
+def find_best_mask(template: ScoringTemplate, candidates: list) -> tuple:
+    """
+    returns the candidate with the lowest penalty (the first one if there are several)
+    branch and bound: a candidate is abandoned as soon as its penalty reaches the best one so far
+
+    Parameters
+    ----------
+    template: ScoringTemplate
+        the template of the candidates
+    candidates: list
+        the packed matrices (see pack_matrices)
+
+    Returns
+    -------
+    tuple
+        (index of the best candidate, its penalty)
+    """
+
+    best_index, best_penalty = None, None
+    for index, dark_bits in enumerate(candidates):
+        penalty = score_bit_packed(dark_bits, template, best_penalty)
+        if penalty is not None:
+            best_index, best_penalty = index, penalty
+
+    return best_index, best_penalty
+
+def get_full_scoring_template(size: int) -> ScoringTemplate:
+    """
+    returns the (cached) ScoringTemplate without any fixed modules for the given size
+    """
+
+    if size not in _full_scoring_templates:
+        _full_scoring_templates[size] = make_scoring_template(np.zeros((size, size), dtype=bool), np.ones((size, size), dtype=bool))
+    return _full_scoring_templates[size]
+
+def calculate_penalties_bit_packed(dark: np.ndarray) -> np.ndarray:
+    """
+    returns the total penalty (all 4 evaluation conditions) for each of the (number of matrices, size, size) matrices,
+    computed with shifts, ANDs and popcounts on the rows and columns packed into python integers
+
+    avoids the overhead of the many small numpy operations of calculate_penalties_vectorized
+    """
+
+    template = get_full_scoring_template(dark.shape[1])
+    return np.array([score_bit_packed(dark_bits, template) for dark_bits in pack_matrices(dark)], dtype=int)
+
+def calculate_penalties(dark: np.ndarray) -> np.ndarray:
+    """
+    returns the total penalty (all 4 evaluation conditions) for each of the matrices
+    (always with the bit packed implementation, the only one used in production)
+
+    Parameters
+    ----------
+    dark: np.ndarray
+        (number of matrices, size, size) bool array, True for dark modules (or a single (size, size) matrix)
+
+    Returns
+    -------
+    np.ndarray
+        the penalty of each matrix (number of matrices,)
+    """
+
+    dark = np.asarray(dark, dtype=bool)
+    if dark.ndim == 2:
+        dark = dark[None]
+
+    return calculate_penalties_bit_packed(dark)
+
+
+def _reference_penalties(matrix: list) -> tuple:
+    """
+    straightforward implementation of the evaluation conditions (ISO/IEC 18004, 7.8.3.1), one module at a time
+    used to check the vectorized implementation
+    """
+
+    size = len(matrix)
+    columns = [[matrix[row][column] for row in range(size)] for column in range(size)]
+    lines = [list(row) for row in matrix] + columns
+
+    penalty_1 = 0
+    for line in lines:
+        run_length = 1
+        for index in range(1, size+1):
+            if index < size and line[index] == line[index-1]:
+                run_length += 1
+            else:
+                if run_length >= 5:
+                    penalty_1 += N1 + run_length - 5
+                run_length = 1
+
+    penalty_2 = 0
+    for row in range(size-1):
+        for column in range(size-1):
+            if matrix[row][column] == matrix[row][column+1] == matrix[row+1][column] == matrix[row+1][column+1]:
+                penalty_2 += N2
+
+    penalty_3 = 0
+    for line in lines:
+        for start in range(size-6):
+            if [int(module) for module in line[start:start+7]] != [1, 0, 1, 1, 1, 0, 1]:
+                continue
+            light_before = not any(line[max(0, start-4):start])
+            light_after = not any(line[start+7:start+11])
+            if light_before or light_after:
+                penalty_3 += N3
+
+    num_dark = sum(sum(row) for row in matrix)
+    percent = num_dark * 100 / (size*size)
+    penalty_4 = N4 * int(abs(percent - 50) // 5)
+
+    return penalty_1, penalty_2, penalty_3, penalty_4
+
+
+def main():
+    # all light 21x21: 42 runs of 21, 400 blocks, no finder like patterns, 0% dark
+    light = np.zeros((1, 21, 21), dtype=bool)
+    assert penalty_runs(light)[0] == 42 * (3 + 16)
+    assert penalty_blocks(light)[0] == 400 * 3
+    assert penalty_finder_like_patterns(light)[0] == 0
+    assert penalty_balance(light)[0] == 100
+
+    # checkerboard: no runs, no blocks, 50% dark (221 of 441 modules)
+    checkerboard = (np.indices((21, 21)).sum(axis=0) % 2 == 0)[None]
+    assert calculate_penalties(checkerboard)[0] == 0
+
+    # finder like patterns in both orientations, at the edge of the symbol (the quiet zone counts as light)
+    matrix = np.zeros((21, 21), dtype=bool)
+    matrix[10, 0:7] = FINDER_LIKE_PATTERN
+    matrix[0:7, 20] = FINDER_LIKE_PATTERN
+    assert penalty_finder_like_patterns(matrix[None])[0] == 2 * N3
+    # a pattern without 4 light modules on either side is not penalized
+    matrix = np.ones((21, 21), dtype=bool)
+    matrix[5, 7:14] = FINDER_LIKE_PATTERN
+    assert penalty_finder_like_patterns(matrix[None])[0] == 0
+
+    # proportion of dark modules: 45% .. 55% has no penalty, the penalty rises every 5%
+    for num_dark, expected in ((50, 0), (46, 0), (54, 0), (45, 10), (55, 10), (41, 10), (40, 20), (61, 20), (100, 100)):
+        matrix = np.zeros(100, dtype=bool)
+        matrix[:num_dark] = True
+        assert penalty_balance(matrix.reshape(1, 10, 10))[0] == expected, (num_dark, expected)
+
+    # random matrices (with some structure) against the reference implementation
+    random_generator = np.random.default_rng(18004)
+    for size in (21, 25, 45):
+        matrices = random_generator.random((6, size, size)) < np.array([0.5, 0.5, 0.3, 0.7, 0.9, 0.1])[:, None, None]
+        matrices[0, 3, 2:9] = FINDER_LIKE_PATTERN
+        matrices[1, 2:9, 4] = FINDER_LIKE_PATTERN
+        penalties = np.stack((penalty_runs(matrices), penalty_blocks(matrices), penalty_finder_like_patterns(matrices), penalty_balance(matrices)), axis=1)
+        for matrix, matrix_penalties in zip(matrices, penalties):
+            assert tuple(matrix_penalties) == _reference_penalties(matrix.tolist()), (size, tuple(matrix_penalties), _reference_penalties(matrix.tolist()))
+        assert calculate_penalties_vectorized(matrices).tolist() == penalties.sum(axis=1).tolist()
+        assert calculate_penalties_bit_packed(matrices).tolist() == penalties.sum(axis=1).tolist()
+
+        # only the variable modules differ: the template has to give the same penalties, and the best mask has to be the first lowest
+        variable = random_generator.random((size, size)) < 0.6
+        variable[:9, :9] = False
+        fixed_dark = matrices[0] & ~variable
+        candidates = matrices & variable | fixed_dark
+        template = make_scoring_template(fixed_dark, variable)
+        candidate_penalties = calculate_penalties_vectorized(candidates)
+        assert [score_bit_packed(bits, template) for bits in pack_matrices(candidates)] == candidate_penalties.tolist()
+        assert find_best_mask(template, pack_matrices(candidates)) == (int(np.argmin(candidate_penalties)), int(candidate_penalties.min()))
+
+    # a sampled template packs pairs of neighbouring lines
+    assert make_scoring_template(np.zeros((21, 21), dtype=bool), np.ones((21, 21), dtype=bool), line_step=8).line_indices == (0, 1, 8, 9, 16, 17)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,93 +1,217 @@
-from itertools import zip_longest
+import numpy as np
 
-from GF256_Number import GF256_Number
+import gf256
+import lookup_tables
 
 
-
-def multiply_terms(term1, term2):
-    """
-    multiply two terms of the generator polynomial
+def make_generator_polynomial(error_correction_codewords: int) -> list:
+    """ 
+    make the generator polynomial for the given amount of error correction codewords
+    (x - alpha**0) * (x - alpha**1) * ... * (x - alpha**(error_correction_codewords-1))
+    
+    Returns
+    -------
+    list
+        an array with the coefficients (integer-notation) of generator polynomial, highest exponent first
     
     """
-    result = []
 
-    for coefficient1, exponent1 in term1:
-        for coefficient2, exponent2 in term2:
-            result.append((coefficient1*coefficient2, exponent1+exponent2))
+    result = [1]
+    for n in range(error_correction_codewords):
+        # multiply the result by the term (x + alpha**n)
+        row = gf256.multiplication_table[gf256.alpha_to_integer_table[n]]
+        result = [coefficient ^ row[previous_coefficient] for coefficient, previous_coefficient in zip(result + [0], [0] + result)]
 
     return result
 
-def combine(term):
+# cache of the generator polynomials, error_correction_codewords -> integer-notation coefficients
+generator_polynomials = {}
+
+def _cache_generator_polynomial(error_correction_codewords: int) -> tuple:
     """
-    combine the generator polynomial
-    
+    makes the generator polynomial and stores it in the cache
     """
-    result = [None]*len(term)
 
-    for coefficient, exponent in term:
-        if result[exponent] is None:
-            result[exponent] = coefficient
-        else:
-            result[exponent] += coefficient
-            result.pop()
-    return [(coefficient, exponent) for exponent, coefficient in reversed(list(enumerate(result)))]
+    coefficients = tuple(make_generator_polynomial(error_correction_codewords))
 
-def make_generator_polynomial(error_correction_codewords: int) -> list:
+    # a single assignment, so other threads only ever see complete entries
+    generator_polynomials[error_correction_codewords] = coefficients
+    return coefficients
+
+def get_generator_polynomial(error_correction_codewords: int) -> tuple:
     """ 
-    make the generator polynomial for the given amount of error correction codewords
+    returns the (cached) generator polynomial for the given amount of error correction codewords
     
     Returns
     -------
-    list
-        an array with the coefficients of generator polynomial
-    
+    tuple
+        the coefficients in integer-notation, highest exponent first
     """
 
-    term = lambda n: [(GF256_Number(alpha=0), 1), (GF256_Number(alpha=n), 0)]
+    if error_correction_codewords not in generator_polynomials:
+        return _cache_generator_polynomial(error_correction_codewords)
+    return generator_polynomials[error_correction_codewords]
 
-    result = term(0)
-    for n in range(1, error_correction_codewords):
-        result = combine(multiply_terms(result, term(n)))
+def precompute_generator_polynomials() -> None:
+    """
+    fills the cache with the generator polynomials for all the amounts of error correction codewords used in QR-Codes
+    (otherwise they are made when they are first needed)
+    """
 
-    return [coefficient for coefficient, exponent in result]
+    for error_correction_info in lookup_tables.error_correction_table.values():
+        if error_correction_info[1] not in generator_polynomials:
+            _cache_generator_polynomial(error_correction_info[1])
 
 def polynomial_long_division_gf256(message_polynomial: list, generator_polynomial: list) -> list:
     """
-    perform the polynomial division
+    perform the polynomial division, returns the remainder of message_polynomial * x**n / generator_polynomial
+    (with n = len(generator_polynomial)-1), all coefficients are in integer-notation
     """
 
-    def polynomial_long_division_gf256_step(message_polynomial: list, generator_polynomial: list) -> list:
-        # Multiply the generator_polynomial by the lead term of the messenger_polynomial
-        lead_coefficient_message = message_polynomial[0]
-        result = [coefficent*lead_coefficient_message for coefficent in generator_polynomial]
-        
-        # XOR the result with the messenger Polynomial (fill with integer=0)
-        coefficient_pairs = zip_longest(message_polynomial, result, fillvalue=GF256_Number(integer=0))
-        result = [message_coefficient + result_1a_coefficient for message_coefficient, result_1a_coefficient in coefficient_pairs]
+    multiplication_table = gf256.multiplication_table
+    generator_tail = generator_polynomial[1:]
 
-        # discard leading zero
-        result = result[1:]
-        return result
+    remainder = [0] * len(generator_tail)
+    for coefficient in message_polynomial:
+        # the lead term of the current message polynomial
+        lead_coefficient = coefficient ^ remainder[0]
+        remainder = remainder[1:]
+        remainder.append(0)
 
-    result = message_polynomial
-    for _ in range(len(message_polynomial)):
-        result = polynomial_long_division_gf256_step(message_polynomial=result, generator_polynomial=generator_polynomial)
+        # XOR the generator_polynomial multiplied by the lead term (multiplying by 0 changes nothing)
+        if lead_coefficient:
+            row = multiplication_table[lead_coefficient]
+            remainder = [remainder_coefficient ^ row[generator_coefficient] for remainder_coefficient, generator_coefficient in zip(remainder, generator_tail)]
     
-    return result
+    return remainder
 
 
 def divide_polynomials(block: list, generator_polynomial: list) -> list:
-    message_polynomial = [GF256_Number(integer=codeword) for codeword in block]
-    error_correction_codewords_single_block = polynomial_long_division_gf256(message_polynomial, generator_polynomial)
-    error_correction_codewords_single_block = [codeword.integer for codeword in error_correction_codewords_single_block] # convert to integers
-    return error_correction_codewords_single_block
+    """
+    returns the error correction codewords (as integers) for a block of data codewords (as integers)
+    """
+    return polynomial_long_division_gf256(block, generator_polynomial)
+
+def divide_polynomials_stacked(blocks: np.ndarray, generator_polynomial: list) -> np.ndarray:
+    """
+    returns the error correction codewords for many blocks at once, all blocks are divided by the same generator_polynomial
+    the division runs as an LFSR, one step per column, for all the blocks at the same time
+    (it builds the parity matrices, the QR-Codes themselves are encoded with encode_blocks)
+
+    Parameters
+    ----------
+    blocks: np.ndarray
+        (number of blocks, block length) uint8 array of data codewords,
+        shorter blocks need to be padded with leading zeros (these don't change the remainder)
+    generator_polynomial: list
+        the coefficients (integer-notation) of the generator polynomial
+
+    Returns
+    -------
+    np.ndarray
+        (number of blocks, len(generator_polynomial)-1) uint8 array of error correction codewords
+    """
+
+    multiplication_matrix = gf256.multiplication_matrix
+    generator_tail = np.asarray(generator_polynomial[1:], dtype=np.uint8)
+
+    remainder = np.zeros((len(blocks), len(generator_tail)), dtype=np.uint8)
+    for column in blocks.T:
+        lead_coefficients = column ^ remainder[:, 0]
+        remainder[:, :-1] = remainder[:, 1:]
+        remainder[:, -1] = 0
+        remainder ^= multiplication_matrix[lead_coefficients[:, None], generator_tail[None, :]]
+
+    return remainder
+
+# cache of the parity matrices, (block length, error_correction_codewords) -> (block length, error_correction_codewords) uint8 array
+parity_matrices = {}
+# cache of the parity tables, (block length, error_correction_codewords) -> (block length, 256, error_correction_codewords) uint8 array
+parity_tables = {}
+
+def get_parity_matrix(block_length: int, error_correction_codewords: int) -> np.ndarray:
+    """
+    returns the (cached) parity matrix for blocks of the given length
+
+    the error correction codewords are linear in the data codewords, row i of the parity matrix
+    holds the error correction codewords of a block that is all zeros except for a 1 at position i
+    """
+
+    key = block_length, error_correction_codewords
+    if key not in parity_matrices:
+        unit_blocks = np.eye(block_length, dtype=np.uint8)
+        parity_matrix = divide_polynomials_stacked(unit_blocks, get_generator_polynomial(error_correction_codewords))
+        parity_matrix.flags.writeable = False
+        parity_matrices[key] = parity_matrix
+    return parity_matrices[key]
+
+def precompute_parity_matrices() -> None:
+    """
+    fills the cache with the parity matrices for all the block lengths used in QR-Codes
+    (otherwise they are made when they are first needed, the larger parity tables are always made when first needed)
+    """
+
+    for _, error_correction_codewords, _, block_length_group_1, blocks_group_2, block_length_group_2 in lookup_tables.error_correction_table.values():
+        get_parity_matrix(block_length_group_1, error_correction_codewords)
+        if blocks_group_2:
+            get_parity_matrix(block_length_group_2, error_correction_codewords)
+
+def get_parity_table(block_length: int, error_correction_codewords: int) -> np.ndarray:
+    """
+    returns the (cached) parity table for blocks of the given length
+
+    parity_table[i, value] = value * (row i of the parity matrix), the error correction codewords
+    contributed by a data codeword with the given value at position i of the block
+    """
+
+    key = block_length, error_correction_codewords
+    if key not in parity_tables:
+        parity_matrix = get_parity_matrix(block_length, error_correction_codewords)
+        parity_table = np.ascontiguousarray(gf256.multiplication_matrix[:, parity_matrix].transpose(1, 0, 2))
+        parity_table.flags.writeable = False
+        parity_tables[key] = parity_table
+    return parity_tables[key]
+
+def encode_blocks(blocks: np.ndarray, error_correction_codewords: int) -> np.ndarray:
+    """
+    returns the error correction codewords for a batch of blocks (of the same length), e.g. from many different QR-Codes
+    the error correction codewords are the product with the parity matrix: one table lookup and XOR per position in the block
+    (this is the encoder of the QR-Codes, see QrCode._make_error_correction_codewords)
+
+    Parameters
+    ----------
+    blocks: np.ndarray
+        (number of blocks, block length) uint8 array of data codewords
+    error_correction_codewords: int
+        the amount of error correction codewords per block
+
+    Returns
+    -------
+    np.ndarray
+        (number of blocks, error_correction_codewords) uint8 array of error correction codewords
+    """
+
+    blocks = np.asarray(blocks, dtype=np.uint8)
+    parity_table = get_parity_table(blocks.shape[1], error_correction_codewords)
+
+    parity = np.zeros((len(blocks), error_correction_codewords), dtype=np.uint8)
+    for position, position_table in enumerate(parity_table):
+        parity ^= position_table[blocks[:, position]]
+
+    return parity
 
 
 def main():
-    # multiply_terms(...)
-    # combine(...) 
     # make_generator_polynomial(...)
-    assert [coefficient.integer for coefficient in make_generator_polynomial(7)] == [1, 127, 122, 154, 164, 11, 68, 117]
+    assert make_generator_polynomial(7) == [1, 127, 122, 154, 164, 11, 68, 117]
+
+    # get_generator_polynomial(...)
+    assert get_generator_polynomial(7) == (1, 127, 122, 154, 164, 11, 68, 117)
+    assert get_generator_polynomial(7) is get_generator_polynomial(7)
+
+    # precompute_generator_polynomials(...)
+    precompute_generator_polynomials()
+    assert sorted(generator_polynomials) == [7, 10, 13, 15, 16, 17, 18, 20, 22, 24, 26, 28, 30]
 
     # polynomial_long_division_gf256(...)
     # ...
@@ -96,6 +220,22 @@ def main():
     assert divide_polynomials([32, 91, 11, 120, 209, 114, 220, 77, 67, 64, 236, 17, 236, 17, 236], make_generator_polynomial(18)) == [141, 200, 113, 155, 101, 253, 211, 137, 230, 12, 37, 93, 52, 6, 180, 144, 233, 213]
     assert divide_polynomials([236, 17, 236, 17, 236, 17, 236, 17, 236, 17, 236, 17, 236, 17, 236, 17], make_generator_polynomial(18)) == [253, 208, 208, 222, 148, 37, 141, 130, 227, 48, 182, 241, 103, 253, 37, 13, 171, 16]
 
+    # divide_polynomials_stacked(...)
+    blocks = np.array([[0, 32, 91, 11, 120, 209, 114, 220, 77, 67, 64, 236, 17, 236, 17, 236], [236, 17, 236, 17, 236, 17, 236, 17, 236, 17, 236, 17, 236, 17, 236, 17]], dtype=np.uint8)
+    assert divide_polynomials_stacked(blocks, make_generator_polynomial(18)).tolist() == [
+        [141, 200, 113, 155, 101, 253, 211, 137, 230, 12, 37, 93, 52, 6, 180, 144, 233, 213],
+        [253, 208, 208, 222, 148, 37, 141, 130, 227, 48, 182, 241, 103, 253, 37, 13, 171, 16]
+    ]
+
+    # encode_blocks(...)
+    assert encode_blocks(blocks, 18).tolist() == divide_polynomials_stacked(blocks, make_generator_polynomial(18)).tolist()
+    random_blocks = np.random.default_rng(0).integers(0, 256, size=(100, 47), dtype=np.uint8)
+    assert np.array_equal(encode_blocks(random_blocks, 28), divide_polynomials_stacked(random_blocks, make_generator_polynomial(28)))
+
+    # precompute_parity_matrices(...)
+    precompute_parity_matrices()
+    assert get_parity_matrix(15, 30).shape == (15, 30)
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
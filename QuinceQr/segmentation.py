@@ -0,0 +1,366 @@
+import math
+import numpy as np
+from typing import NamedTuple, Union
+
+from enumerations import *
+import lookup_tables
+import util
+
+
+# the ECI assignment number for UTF-8, used when the text can't be encoded in ISO 8859-1 (the default for byte mode)
+UTF8_ECI_ASSIGNMENT_NUMBER = 26
+
+# the modes the segmentation chooses from (kanji is not implemented)
+segment_modes = (ModeIndicator.numeric_mode, ModeIndicator.alphanumeric_mode, ModeIndicator.byte_mode)
+
+# the cost of a single character in 1/6 bits (a digit takes 10/3 bits, an alphanumeric character 11/2 bits)
+NUMERIC_CHARACTER_COST = 20
+ALPHANUMERIC_CHARACTER_COST = 33
+
+
+class Segment(NamedTuple):
+    """
+    a part of the data, that is encoded in a single mode
+
+    Attributes:
+        mode (ModeIndicator): the mode of the segment
+        data (str | bytes | int): the text (numeric and alphanumeric mode), the bytes (byte mode) or the ECI assignment number (eci mode)
+    """
+
+    mode: ModeIndicator
+    data: Union[str, bytes, int]
+
+
+class VersionPlan(NamedTuple):
+    """
+    the smallest versions for many payloads and error correction levels, see plan_versions
+
+    Attributes:
+        versions (np.ndarray): (number of payloads, number of error correction levels) int array of the smallest versions, 0 where the payload overflows
+        overflows (np.ndarray): bool array of the same shape, True where the payload doesn't fit into version 40
+        leftover_bits (np.ndarray): int array of the same shape, the unused data bits of the version
+            (negative for the overflowing payloads: the missing bits in version 40)
+    """
+
+    versions: np.ndarray
+    overflows: np.ndarray
+    leftover_bits: np.ndarray
+
+
+def get_byte_encoding(text: str) -> str:
+    """
+    returns the encoding used for the byte mode segments: ISO 8859-1 if possible, otherwise UTF-8 (which needs an ECI segment)
+
+    """
+
+    try:
+        text.encode("ISO 8859-1")
+    except UnicodeEncodeError:
+        return "UTF-8"
+    return "ISO 8859-1"
+
+def get_segment_bit_length(segment: Segment, version: int) -> int:
+    """
+    returns the amount of bits of an encoded segment, including the mode indicator and the character count indicator
+
+    """
+
+    if segment.mode == ModeIndicator.eci_mode:
+        return 4 + 8
+
+    num_characters = len(segment.data)
+    header_length = 4 + util.calculate_character_counter_indicater_pad(version, segment.mode)
+
+    if segment.mode == ModeIndicator.numeric_mode:
+        return header_length + 10*(num_characters // 3) + (0, 4, 7)[num_characters % 3]
+    if segment.mode == ModeIndicator.alphanumeric_mode:
+        return header_length + 11*(num_characters // 2) + 6*(num_characters % 2)
+    if segment.mode == ModeIndicator.byte_mode:
+        return header_length + 8*num_characters
+    raise TypeError(f"mode not supported: {segment.mode}")
+
+def get_bit_length(segments: list, version: int) -> int:
+    """
+    returns the amount of bits of all the encoded segments
+
+    """
+
+    return sum(get_segment_bit_length(segment, version) for segment in segments)
+
+def _get_character_modes(text: str, version: int, byte_encoding: str) -> list:
+    """
+    returns the cheapest mode for every character of the text (dynamic programming over the modes of the characters)
+
+    the costs are counted in 1/6 bits, so that the cost of numeric and alphanumeric characters are whole numbers,
+    cost[mode] is the cheapest encoding of the text so far, that ends in a segment of the mode
+    """
+
+    header_costs = [(4 + util.calculate_character_counter_indicater_pad(version, mode)) * 6 for mode in segment_modes]
+    num_modes = len(segment_modes)
+    numeric, alphanumeric, byte = range(num_modes)
+
+    costs = header_costs[:]
+    # character_modes[i][mode] = the mode of character i, when the segment after character i is in the given mode
+    character_modes = []
+
+    for character in text:
+        current_costs = [math.inf] * num_modes
+        current_modes = [None] * num_modes
+
+        current_costs[byte] = costs[byte] + len(character.encode(byte_encoding)) * 8 * 6
+        current_modes[byte] = byte
+        if character in util.alphanumeric_ids:
+            current_costs[alphanumeric] = costs[alphanumeric] + ALPHANUMERIC_CHARACTER_COST
+            current_modes[alphanumeric] = alphanumeric
+        if character in util.digits:
+            current_costs[numeric] = costs[numeric] + NUMERIC_CHARACTER_COST
+            current_modes[numeric] = numeric
+
+        # switching to a new segment after this character (the segment so far is rounded up to whole bits)
+        segment_end_costs = [math.ceil(cost / 6) * 6 if mode is not None else math.inf for cost, mode in zip(current_costs, current_modes)]
+        for to_mode in range(num_modes):
+            for from_mode in range(num_modes):
+                new_cost = segment_end_costs[from_mode] + header_costs[to_mode]
+                if new_cost < current_costs[to_mode]:
+                    current_costs[to_mode] = new_cost
+                    current_modes[to_mode] = from_mode
+
+        character_modes.append(current_modes)
+        costs = current_costs
+
+    # walk back from the cheapest final mode
+    mode = min(range(num_modes), key=lambda mode: costs[mode])
+    result = [None] * len(text)
+    for index in reversed(range(len(text))):
+        mode = character_modes[index][mode]
+        result[index] = mode
+
+    return [segment_modes[mode] for mode in result]
+
+def make_segments(text: str, version: int) -> list:
+    """
+    splits the text into the segments with the smallest total bit length for the given version
+    (the length of the character count indicators depends on the version)
+
+    Parameters
+    ----------
+    text: str
+        the text to be encoded
+    version: int
+        the version of the QR-Code
+
+    Returns
+    -------
+    list
+        the segments (Segment), with an ECI segment at the start if the text needs UTF-8
+    """
+
+    byte_encoding = get_byte_encoding(text)
+    segments = []
+    if byte_encoding == "UTF-8":
+        segments.append(Segment(ModeIndicator.eci_mode, UTF8_ECI_ASSIGNMENT_NUMBER))
+
+    if not text:
+        return segments
+
+    # shortcuts for texts in a single mode, where the dynamic programming can't find anything better
+    characters = set(text)
+    if characters.issubset(util.digits):
+        return segments + [Segment(ModeIndicator.numeric_mode, text)]
+    if characters.issubset(util.alphanumeric) and characters.isdisjoint(util.digits):
+        return segments + [Segment(ModeIndicator.alphanumeric_mode, text)]
+    if characters.isdisjoint(util.alphanumeric):
+        return segments + [Segment(ModeIndicator.byte_mode, text.encode(byte_encoding))]
+
+    character_modes = _get_character_modes(text, version, byte_encoding)
+
+    start = 0
+    for index in range(1, len(text)+1):
+        if index == len(text) or character_modes[index] != character_modes[start]:
+            mode = character_modes[start]
+            data = text[start:index]
+            segments.append(Segment(mode, data.encode(byte_encoding) if mode == ModeIndicator.byte_mode else data))
+            start = index
+
+    return segments
+
+def make_segments_for_smallest_version(text: str, error_correction_level: ErrorCorrectionLevel, minimum_version: int = 1) -> tuple:
+    """
+    finds the smallest version (at least minimum_version), that fits the text, and the segments for it
+
+    the segments are only made for the SizeLevels, that could fit the text at all
+    (every character takes at least 10/3 bits), so too much data is rejected before the segmentation
+
+    Returns
+    -------
+    tuple
+        (segments, version)
+    """
+
+    minimum_data_bit_length = math.ceil(len(text) * 10 / 3)
+
+    for size_level, versions in lookup_tables.size_level_versions.items():
+        first_version = max(versions[0], minimum_version)
+        if first_version > versions[-1]:
+            continue
+
+        minimum_bit_length = 4 + util.calculate_character_counter_indicater_pad(versions[0], ModeIndicator.numeric_mode) + minimum_data_bit_length
+        if util.get_smallest_version_for_bit_length(minimum_bit_length, error_correction_level, first_version, versions[-1]) is None:
+            continue
+
+        segments = make_segments(text, versions[0])
+        bit_length = get_bit_length(segments, versions[0])
+
+        version = util.get_smallest_version_for_bit_length(bit_length, error_correction_level, first_version, versions[-1])
+        if version is not None:
+            return segments, version
+
+    raise Exception("too much data, can't fit inside QR-Code")
+
+def get_size_level_bit_lengths(text: str) -> list:
+    """
+    returns the bit length of the text for every SizeLevel, segmented for the first version of the SizeLevel (like make_segments_for_smallest_version)
+
+    """
+
+    return [get_bit_length(make_segments(text, versions[0]), versions[0]) for versions in lookup_tables.size_level_versions.values()]
+
+def plan_versions(bit_lengths, error_correction_levels: tuple = tuple(ErrorCorrectionLevel), minimum_version: int = 1) -> VersionPlan:
+    """
+    finds the smallest version (at least minimum_version) for many payloads and error correction levels at once
+    (one vectorized binary search over the data bit capacities per SizeLevel and error correction level)
+
+    Parameters
+    ----------
+    bit_lengths
+        (number of payloads,) the encoded bit lengths (including the segment headers),
+        or (number of payloads, 3) the bit lengths for every SizeLevel (see get_size_level_bit_lengths)
+        a 1-D input is used for all 3 SizeLevels, so it assumes the segment headers don't depend on the SizeLevel
+        (not true for the character count indicators of most texts: pass the (number of payloads, 3) lengths for those)
+    error_correction_levels: tuple
+        the error correction levels, one column of the result each
+
+    Returns
+    -------
+    VersionPlan
+        the versions, overflows and leftover bits
+    """
+
+    num_size_levels = len(lookup_tables.size_level_versions)
+    bit_lengths = np.asarray(bit_lengths, dtype=np.int64)
+    if bit_lengths.ndim == 1:
+        bit_lengths = bit_lengths.reshape(-1, 1)
+    # (3, number of payloads), one contiguous row per SizeLevel
+    bit_lengths = np.ascontiguousarray(np.broadcast_to(bit_lengths, (len(bit_lengths), num_size_levels)).T)
+
+    # (number of error correction levels, 40)
+    capacities = lookup_tables.data_bit_capacity_array[:, util.get_error_correction_level_indices(error_correction_levels)].T.astype(np.int64)
+
+    # the capacities increase with the version, so the first version that fits is found with a binary search in each SizeLevel
+    # (the SizeLevels are searched from small to large, the first one that fits wins)
+    versions = np.zeros((len(capacities), bit_lengths.shape[1]), dtype=np.int64)
+    size_level_indices = np.full(versions.shape, num_size_levels-1)
+    for size_level_index, size_level_versions in enumerate(lookup_tables.size_level_versions.values()):
+        first_version = max(size_level_versions[0], minimum_version)
+        if first_version > size_level_versions[-1]:
+            continue
+
+        for row in range(len(capacities)):
+            found_versions = first_version + np.searchsorted(capacities[row, first_version-1:size_level_versions[-1]], bit_lengths[size_level_index])
+            found = (versions[row] == 0) & (found_versions <= size_level_versions[-1])
+            versions[row] = np.where(found, found_versions, versions[row])
+            size_level_indices[row] = np.where(found, size_level_index, size_level_indices[row])
+
+    # the overflowing payloads are compared against version 40
+    overflows = versions == 0
+    chosen_versions = np.where(overflows, capacities.shape[1], versions)
+    leftover_bits = np.take_along_axis(capacities, chosen_versions-1, axis=1) - np.take_along_axis(bit_lengths, size_level_indices, axis=0)
+
+    versions, overflows, leftover_bits = versions.T, overflows.T, leftover_bits.T
+    return VersionPlan(versions, overflows, leftover_bits)
+
+def plan_versions_for_texts(texts: list, error_correction_levels: tuple = tuple(ErrorCorrectionLevel), minimum_version: int = 1) -> VersionPlan:
+    """
+    plan_versions for texts: every text is segmented once per SizeLevel, then all of them are planned at once
+
+    """
+
+    return plan_versions([get_size_level_bit_lengths(text) for text in texts], error_correction_levels, minimum_version)
+
+def main():
+    # make_segments(...)
+    assert make_segments("0123456789", 1) == [Segment(ModeIndicator.numeric_mode, "0123456789")]
+    assert make_segments("HELLO WORLD", 1) == [Segment(ModeIndicator.alphanumeric_mode, "HELLO WORLD")]
+    assert make_segments("hello", 1) == [Segment(ModeIndicator.byte_mode, b"hello")]
+    assert make_segments("", 1) == []
+
+    # a long run of digits gets its own segment, instead of pushing everything into byte mode
+    assert make_segments("a" + "1"*30, 1) == [Segment(ModeIndicator.byte_mode, b"a"), Segment(ModeIndicator.numeric_mode, "1"*30)]
+    assert make_segments("HELLO 123456789012345678901234 WORLD", 1) == [
+        Segment(ModeIndicator.alphanumeric_mode, "HELLO "),
+        Segment(ModeIndicator.numeric_mode, "123456789012345678901234"),
+        Segment(ModeIndicator.alphanumeric_mode, " WORLD")
+    ]
+    # short runs are not worth a new segment
+    assert make_segments("a1b", 1) == [Segment(ModeIndicator.byte_mode, b"a1b")]
+
+    # text outside of ISO 8859-1 is encoded in UTF-8, with an ECI segment
+    assert make_segments("€ 5", 1) == [Segment(ModeIndicator.eci_mode, 26), Segment(ModeIndicator.byte_mode, "€ 5".encode("UTF-8"))]
+    assert make_segments("äöü", 1) == [Segment(ModeIndicator.byte_mode, "äöü".encode("ISO 8859-1"))]
+
+    # get_bit_length(...)
+    assert get_bit_length(make_segments("HELLO WORLD", 1), 1) == 4 + 9 + 61
+    assert get_bit_length(make_segments("01234567", 1), 1) == 4 + 10 + 27
+    assert get_bit_length(make_segments("€", 1), 1) == 12 + 4 + 8 + 24
+
+    # make_segments_for_smallest_version(...)
+    assert make_segments_for_smallest_version("HELLO WORLD", ErrorCorrectionLevel.Q)[1] == 1
+    assert make_segments_for_smallest_version("HELLO WORLD", ErrorCorrectionLevel.Q, minimum_version=12)[1] == 12
+    assert make_segments_for_smallest_version("1"*7089, ErrorCorrectionLevel.L)[1] == 40
+    assert make_segments_for_smallest_version("a"*2953, ErrorCorrectionLevel.L)[1] == 40
+    assert make_segments_for_smallest_version("a"*26, ErrorCorrectionLevel.Q)[1] == 3
+    try:
+        make_segments_for_smallest_version("1"*7090, ErrorCorrectionLevel.L)
+    except Exception:
+        pass
+    else:
+        raise AssertionError("too much data should raise")
+
+    # plan_versions(...)
+    texts = ["HELLO WORLD", "", "a"*26, "a1b"*40, "€ 5", "1"*7089, "a"*2953, "1"*7090, "HELLO 123456789012345678901234 WORLD"*20]
+    plan = plan_versions_for_texts(texts)
+    assert plan.versions.shape == plan.overflows.shape == plan.leftover_bits.shape == (len(texts), 4)
+    for text_index, text in enumerate(texts):
+        for error_correction_level_index, error_correction_level in enumerate(ErrorCorrectionLevel):
+            try:
+                segments, version = make_segments_for_smallest_version(text, error_correction_level)
+            except Exception:
+                assert plan.overflows[text_index, error_correction_level_index] and plan.versions[text_index, error_correction_level_index] == 0
+                assert plan.leftover_bits[text_index, error_correction_level_index] < 0
+                continue
+            assert not plan.overflows[text_index, error_correction_level_index]
+            assert plan.versions[text_index, error_correction_level_index] == version
+            capacity = lookup_tables.data_bit_capacities[error_correction_level][version-1]
+            assert plan.leftover_bits[text_index, error_correction_level_index] == capacity - get_bit_length(segments, version)
+
+    plan = plan_versions([152, 153, 23648, 23649], (ErrorCorrectionLevel.L,))
+    assert plan.versions[:, 0].tolist() == [1, 2, 40, 0]
+    assert plan.leftover_bits[:, 0].tolist() == [0, 272-153, 0, -1]
+    assert plan_versions([152], (ErrorCorrectionLevel.L,), minimum_version=12).versions.tolist() == [[12]]
+
+    # the SizeLevel boundaries: 230 bytes fill version 9 (1852 of 1856 bits), one more byte needs version 10 with its longer character count indicator,
+    # 272 bytes fit version 10 with the small header (2188 bits) but not with the medium one (2196 of 2192 bits)
+    boundary_texts = ["a"*230, "a"*231, "a"*272]
+    assert plan_versions_for_texts(boundary_texts, (ErrorCorrectionLevel.L,)).versions[:, 0].tolist() == [9, 10, 11]
+    assert [make_segments_for_smallest_version(text, ErrorCorrectionLevel.L)[1] for text in boundary_texts] == [9, 10, 11]
+    # a 1-D input with the small header lengths gets that wrong
+    assert plan_versions([get_size_level_bit_lengths(text)[0] for text in boundary_texts], (ErrorCorrectionLevel.L,)).versions[:, 0].tolist() == [9, 10, 10]
+
+    # an empty batch
+    for plan in (plan_versions([]), plan_versions(np.array([], dtype=int)), plan_versions_for_texts([])):
+        assert plan.versions.shape == plan.overflows.shape == plan.leftover_bits.shape == (0, 4)
+    assert plan_versions([], (ErrorCorrectionLevel.L, ErrorCorrectionLevel.H)).versions.shape == (0, 2)
+
+
+if __name__ == "__main__":
+    main()
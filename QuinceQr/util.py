@@ -1,6 +1,8 @@
+import bisect
 import numpy as np
 
-from itertools import zip_longest, product
+from itertools import product
+from operator import attrgetter
 
 from enumerations import *
 import lookup_tables
@@ -9,13 +11,25 @@ import lookup_tables
 digits = "0123456789" # only digits
 alphanumeric = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:" # digits, cap_alphabet, space, $, %, *, +, -, ., /, :
 
+alphanumeric_ids = {char: char_id for char_id, char in enumerate(alphanumeric)}
+# for bytes.translate: maps the (ascii) bytes of the alphanumeric characters to their ids
+alphanumeric_translation_table = bytes.maketrans(alphanumeric.encode("ascii"), bytes(range(len(alphanumeric))))
+
 def get_char_id(char: str) -> int:
     """
-    returns the id of an character in alphanumeric encoding
+    returns the id of an character in alphanumeric encoding (-1 if it is not an alphanumeric character)
+
+    """
+
+    return alphanumeric_ids.get(char, -1)
+
+def get_char_ids(text: str) -> np.ndarray:
+    """
+    returns the ids of all the characters of an alphanumeric text, as an uint8 array
 
     """
 
-    return alphanumeric.find(char)
+    return np.frombuffer(text.encode("ascii").translate(alphanumeric_translation_table), dtype=np.uint8)
 
 def get_size_from_version(version: int) -> SizeLevel:
     """
@@ -48,11 +62,44 @@ def calculate_character_counter_indicater_pad(version: int, mode: ModeIndicator)
         length of the character_count_indicator pad
     """
     
-    return lookup_tables.char_count_byte_length_for_version_and_mode[get_size_from_version(version)][mode]
+    if not 1 <= version <= 40:
+        raise ValueError(f"the specified version is not between 1 through 40 (inclusive): {version}")
+    return lookup_tables.character_count_indicator_length_rows[version-1][mode.value]
+
+def get_data_bit_length(character_length: int, mode: ModeIndicator) -> int:
+    """
+    returns the amount of bits of the encoded data (without mode and character count indicator) in a single mode
+
+    """
+
+    if mode == ModeIndicator.numeric_mode:
+        return 10*(character_length // 3) + (0, 4, 7)[character_length % 3]
+    if mode == ModeIndicator.alphanumeric_mode:
+        return 11*(character_length // 2) + 6*(character_length % 2)
+    if mode == ModeIndicator.byte_mode:
+        return 8*character_length
+    if mode == ModeIndicator.kanji_mode:
+        return 13*character_length
+    raise TypeError(f"mode not found: {mode}")
+
+def get_smallest_version_for_bit_length(bit_length: int, error_correction_level: ErrorCorrectionLevel, minimum_version: int = 1, maximum_version: int = 40):
+    """
+    returns the smallest version in the range minimum_version through maximum_version (inclusive), that has room for bit_length data bits
+    (binary search over the data bit capacities), None if none of them do
+
+    """
+
+    capacities = lookup_tables.data_bit_capacities[error_correction_level]
+    index = bisect.bisect_left(capacities, bit_length, minimum_version-1, maximum_version)
+    if index < maximum_version:
+        return index+1
+    return None
 
 def get_qr_code_version(character_length: int, mode: ModeIndicator, error_correction_level: ErrorCorrectionLevel, minimum_version:int=1) -> int:
     """ 
     get the minumum version (equivalent to the size of the qr code) for the specified mode and error correction level
+    the exact amount of bits is computed for each SizeLevel (the length of the character count indicator changes) 
+    and looked up in the data bit capacities of the versions
     
     Parameters
     ----------
@@ -71,10 +118,17 @@ def get_qr_code_version(character_length: int, mode: ModeIndicator, error_correc
         the version of the QR-Code
     """
     
-    for index, version in enumerate(lookup_tables.version_dict):
-        length_in_version = version[error_correction_level][mode.value]
-        if length_in_version >= character_length:
-            return max(index+1, minimum_version)
+    data_bit_length = get_data_bit_length(character_length, mode)
+
+    for size_level, versions in lookup_tables.size_level_versions.items():
+        first_version = max(versions[0], minimum_version)
+        if first_version > versions[-1]:
+            continue
+
+        bit_length = 4 + calculate_character_counter_indicater_pad(versions[0], mode) + data_bit_length
+        version = get_smallest_version_for_bit_length(bit_length, error_correction_level, first_version, versions[-1])
+        if version is not None:
+            return version
 
     raise Exception("too much data, can't fit inside QR-Code")
 
@@ -86,6 +140,16 @@ def get_mode_indicator_bits(mode: ModeIndicator) -> str:
     
     return lookup_tables.mode_indicator_mapping[mode]
 
+def _get_error_correction_info(version: int, error_correction_level: ErrorCorrectionLevel) -> list:
+    """
+    returns the row of the error correction table as a list of ints
+    (Total Number of Data Codewords, EC Codewords Per Block, Blocks in Group 1, Codewords per Block of Group 1, Blocks in Group 2, Codewords per Block of Group 2)
+    """
+
+    if not 1 <= version <= 40:
+        raise ValueError(f"the version needs to be in the range 1 through 40")
+    return lookup_tables.error_correction_rows[version-1][error_correction_level.value-1]
+
 def get_total_number_codewords(version: int, error_correction_level: ErrorCorrectionLevel) -> int:
     """ 
     get the amount of total datacodewords in a QR-Code for any given version & error correction level
@@ -98,7 +162,7 @@ def get_total_number_codewords(version: int, error_correction_level: ErrorCorrec
     
     """
     
-    error_correction_info = lookup_tables.error_correction_table[version, error_correction_level]
+    error_correction_info = _get_error_correction_info(version, error_correction_level)
     return error_correction_info[0]
 
 def get_blocks_per_group(version: int, error_correction_level: ErrorCorrectionLevel) -> tuple:
@@ -113,7 +177,7 @@ def get_blocks_per_group(version: int, error_correction_level: ErrorCorrectionLe
     
     """
     
-    error_correction_info = lookup_tables.error_correction_table[version, error_correction_level]
+    error_correction_info = _get_error_correction_info(version, error_correction_level)
     return (error_correction_info[2], error_correction_info[4])
 
 def get_codewords_per_block(version: int, error_correction_level: ErrorCorrectionLevel) -> tuple:
@@ -128,7 +192,7 @@ def get_codewords_per_block(version: int, error_correction_level: ErrorCorrectio
     
     """
     
-    error_correction_info = lookup_tables.error_correction_table[version, error_correction_level]
+    error_correction_info = _get_error_correction_info(version, error_correction_level)
     return (error_correction_info[3], error_correction_info[5])
 
 def get_error_correction_codewords_per_block(version: int, error_correction_level: ErrorCorrectionLevel) -> int:
@@ -143,10 +207,88 @@ def get_error_correction_codewords_per_block(version: int, error_correction_leve
     
     """
     
-    error_correction_info = lookup_tables.error_correction_table[version, error_correction_level]
+    error_correction_info = _get_error_correction_info(version, error_correction_level)
     return error_correction_info[1]
 
 
+# the vectorized accessors below answer many queries at once: the arguments are broadcast against each other like numpy arrays
+
+def get_version_indices(versions) -> np.ndarray:
+    """
+    returns versions-1, the index of the versions in the flat lookup tables
+
+    """
+
+    versions = np.asarray(versions)
+    if not np.all((1 <= versions) & (versions <= 40)):
+        raise ValueError(f"the versions need to be in the range 1 through 40")
+    return versions - 1
+
+def get_enum_values(members) -> np.ndarray:
+    """
+    returns the values of one or many enum members as an int array, integers are taken as values already
+
+    """
+
+    members = np.asarray(members)
+    if members.dtype == object:
+        members = np.asarray(np.frompyfunc(attrgetter("value"), 1, 1)(members))
+    return members.astype(np.intp)
+
+def get_error_correction_level_indices(error_correction_levels) -> np.ndarray:
+    """
+    returns the index (value-1) of one or many error correction levels in the flat lookup tables
+
+    """
+
+    return get_enum_values(error_correction_levels) - 1
+
+def get_mode_indices(modes) -> np.ndarray:
+    """
+    returns the index (value) of one or many modes in the flat lookup tables
+
+    """
+
+    return get_enum_values(modes)
+
+def get_error_correction_infos(versions, error_correction_levels) -> np.ndarray:
+    """
+    returns the rows of the error correction table for many versions and error correction levels at once
+
+    Returns
+    -------
+    np.ndarray
+        int16 array with the shape (..., 6), see _get_error_correction_info for the columns
+    """
+
+    return lookup_tables.error_correction_array[get_version_indices(versions), get_error_correction_level_indices(error_correction_levels)]
+
+def get_data_bit_capacities(versions, error_correction_levels) -> np.ndarray:
+    """
+    returns the amount of data bits for many versions and error correction levels at once
+
+    """
+
+    return lookup_tables.data_bit_capacity_array[get_version_indices(versions), get_error_correction_level_indices(error_correction_levels)]
+
+def get_character_capacities(versions, error_correction_levels, modes) -> np.ndarray:
+    """
+    returns the amount of characters that fit into the versions, for many versions, error correction levels and modes at once
+    modes are ModeIndicators or their values (numeric, alphanumeric, byte and kanji mode)
+
+    """
+
+    return lookup_tables.character_capacity_array[get_version_indices(versions), get_error_correction_level_indices(error_correction_levels), get_mode_indices(modes)]
+
+def get_character_count_indicator_lengths(versions, modes) -> np.ndarray:
+    """
+    returns the length of the character count indicators for many versions and modes at once
+
+    """
+
+    return lookup_tables.character_count_indicator_length_array[get_version_indices(versions), get_mode_indices(modes)]
+
+
 def split_string_into_chunks(string: str, chunk_size: int = 8):
     """ 
     split a string into evenly sized chunks
@@ -154,14 +296,43 @@ def split_string_into_chunks(string: str, chunk_size: int = 8):
     """
     return [string[index:(index+chunk_size)] for index in range(0, len(string), chunk_size)]
 
-def interweave_codewords(codewords: list) -> list:
-    # flatten, to make one array of blocks
-    flattened = sum(codewords, [])
-    # zip together all the blocks
-    zipped = zip_longest(*flattened, fillvalue=None)
-    # remove all 'None's and flatten again
-    result = list(filter(lambda value: value is not None, sum(zipped, ())))
-    return result
+# cache of the interleave permutations, (version, error_correction_level) -> index array, see get_interleave_permutation
+interleave_permutations = {}
+
+def get_interleave_permutation(version: int, error_correction_level: ErrorCorrectionLevel) -> np.ndarray:
+    """
+    returns the order in which the codewords are placed in the QR-Code (cached, read-only)
+    the codewords are indexed block after block: first all data codewords, then all error correction codewords
+    the final message is codewords[permutation]: the first codeword of every block, then the second one, ... (blocks that are shorter are skipped),
+    first for the data codewords, then for the error correction codewords
+
+    Returns
+    -------
+    np.ndarray
+        int array, one index for every codeword
+    """
+
+    key = (version, error_correction_level)
+    if key in interleave_permutations:
+        return interleave_permutations[key]
+
+    num_of_blocks_per_group = get_blocks_per_group(version, error_correction_level)
+    num_of_codewords_per_block = get_codewords_per_block(version, error_correction_level)
+    num_of_error_correction_codewords = get_error_correction_codewords_per_block(version, error_correction_level)
+
+    block_lengths = np.repeat(num_of_codewords_per_block, num_of_blocks_per_group)
+    block_starts = np.cumsum(block_lengths) - block_lengths
+    num_of_data_codewords = int(block_lengths.sum())
+
+    # row i holds the ith codeword of every block, rows are read one after another
+    positions = np.arange(block_lengths.max())[:, np.newaxis]
+    data_order = (block_starts + positions)[positions < block_lengths]
+    error_correction_order = num_of_data_codewords + np.arange(len(block_lengths))*num_of_error_correction_codewords + np.arange(num_of_error_correction_codewords)[:, np.newaxis]
+
+    permutation = np.concatenate((data_order, error_correction_order.ravel()))
+    permutation.flags.writeable = False
+    interleave_permutations[key] = permutation
+    return permutation
 
 # with open('../resources/remainder_bits.pickle', 'rb') as file:
 #     # Load the array from the file using pickle
@@ -181,31 +352,28 @@ def calc_qr_size(version: int) -> int:
 
 def place_pattern(matrix: np.ndarray, pattern: np.ndarray, upper_left_corner: tuple, overwrite=True) -> np.ndarray:
     """ 
-    place a pattern from a small 2d array into a big 2d array at a certain position
+    place a pattern from a small 2d array into a big 2d array at a certain position (in place, the matrix is returned as well)
     if overwrite is False, the matrix will not be change if something beside 'Module.empty' would be overwritten
     """
 
-    mat = matrix.copy()
-
     # Check that the pattern fits within the bounds of the matrix
-    if upper_left_corner[0] + len(pattern[0]) > len(mat[0]) or upper_left_corner[1] + len(pattern) > len(mat):
-        raise ValueError(f"Pattern does not fit within matrix bounds: {upper_left_corner=}, {mat.shape=}, {pattern.shape=}")
+    if upper_left_corner[0] + len(pattern[0]) > len(matrix[0]) or upper_left_corner[1] + len(pattern) > len(matrix):
+        raise ValueError(f"Pattern does not fit within matrix bounds: {upper_left_corner=}, {matrix.shape=}, {pattern.shape=}")
 
     # Check that the upper_left_corner coordinates are valid
     if upper_left_corner[0] < 0 or upper_left_corner[1] < 0:
         raise ValueError("Upper left corner coordinates must be non-negative")
 
     end = upper_left_corner[0]+len(pattern[0]), upper_left_corner[1]+len(pattern)
+    area = matrix[upper_left_corner[1]:end[1], upper_left_corner[0]:end[0]]
 
     # only change the matrix if the 'overwrite' flag is set
-    if not overwrite:
-        area = mat[upper_left_corner[1]:end[1], upper_left_corner[0]:end[0]]
-        if not np.all(area == np.full_like(pattern, fill_value=Module.empty)):
-            return mat
-        
-    mat[upper_left_corner[1]:end[1], upper_left_corner[0]:end[0]] = pattern
+    if not overwrite and np.any(area != Module.empty):
+        return matrix
 
-    return mat
+    area[...] = pattern
+
+    return matrix
 
 def calculate_finder_positions(version: int) -> tuple:
     """ 
@@ -218,7 +386,7 @@ def shift_finder_pattern(upper_left_corner: tuple, offset: tuple) -> tuple:
     """ 
     shift the finder pattern to the new position within an 8x8 matrix
     """
-    shifted_pattern = place_pattern(np.full((8, 8), fill_value=Module.white), lookup_tables.FINDER_PATTERN, offset)
+    shifted_pattern = place_pattern(np.full((8, 8), fill_value=Module.white, dtype=module_dtype), lookup_tables.FINDER_PATTERN, offset)
     upper_left_corner = upper_left_corner[0]-offset[0], upper_left_corner[1]-offset[1]
     
     return shifted_pattern, upper_left_corner
@@ -239,7 +407,7 @@ def make_timing_patterns(version: int) -> tuple:
     size = calc_qr_size(version)
     length = int((size-16)/2)
     # interchanging black and white, but starts with black and ends with black
-    horizontal = np.array([[Module.black, *[Module.white, Module.black]*length]])
+    horizontal = np.array([[Module.black, *[Module.white, Module.black]*length]], dtype=module_dtype)
     
     return horizontal, np.rot90(horizontal)
 
@@ -257,18 +425,102 @@ def get_format_information_string(error_correction_level: ErrorCorrectionLevel,
         raise ValueError(f"mask_pattern_num must be in range 0 <= mask_pattern_num <= 7, not: {mask_pattern_num=}")
     return lookup_tables.format_information_string[error_correction_level, mask_pattern_num]
 
+def get_format_information_bits(error_correction_level: ErrorCorrectionLevel, mask_pattern_num: int) -> np.ndarray:
+    """
+    returns the format information string as a (15,) bool array (True for a dark module)
+    """
+    if not 0 <= mask_pattern_num <= 7:
+        raise ValueError(f"mask_pattern_num must be in range 0 <= mask_pattern_num <= 7, not: {mask_pattern_num=}")
+    return lookup_tables.format_information_bits[error_correction_level, mask_pattern_num]
+
+def get_version_information_bits(version: int) -> np.ndarray:
+    """
+    returns the version information string as a (18,) bool array (True for a dark module), for versions above 6
+    """
+    if 6 < version < 41:
+        return lookup_tables.version_information_bits[version]
+    raise ValueError(f"version must be in range 6 < version < 41, not: {version=}")
+
+# caches of the coordinates, version -> (row indices, column indices), see get_format_information_coordinates and get_version_information_coordinates
+format_information_coordinates = {}
+version_information_coordinates = {}
+
+def get_format_information_coordinates(version: int) -> tuple:
+    """
+    returns the coordinates of the 2 copies of the format information (cached, read-only)
+    bit i of the format information string is placed at (rows[copy, i], columns[copy, i])
+
+    copy 0: row 8 (columns 0..5, 7), then column 8 (rows 8, 7, 5..0), around the top left finder pattern
+    copy 1: column 8 (rows size-1..size-7) below the top left finder pattern, then row 8 (columns size-8..size-1)
+
+    Returns
+    -------
+    tuple
+        (row indices, column indices), both (2, 15) int arrays
+    """
+
+    if version in format_information_coordinates:
+        return format_information_coordinates[version]
+
+    size = calc_qr_size(version)
+    around_top_left = [(8, column) for column in (0, 1, 2, 3, 4, 5, 7)] + [(row, 8) for row in (8, 7, 5, 4, 3, 2, 1, 0)]
+    split = [(row, 8) for row in range(size-1, size-8, -1)] + [(8, column) for column in range(size-8, size)]
+
+    rows, columns = np.array([around_top_left, split]).transpose(2, 0, 1)
+    for array in (rows, columns):
+        array.flags.writeable = False
+    format_information_coordinates[version] = rows, columns
+    return format_information_coordinates[version]
+
+def get_version_information_coordinates(version: int) -> tuple:
+    """
+    returns the coordinates of the 2 copies of the version information (cached, read-only), for versions above 6
+    bit i of the version information string is placed at (rows[copy, i], columns[copy, i])
+
+    copy 0: the 6x3 block above the top right finder pattern, copy 1: the 3x6 block left of the bottom left finder pattern (transposed)
+    both start with the module closest to the finder pattern: bit i is in the (5 - i//3)th line and the (2 - i%3)th module of the block
+
+    Returns
+    -------
+    tuple
+        (row indices, column indices), both (2, 18) int arrays
+    """
+
+    if not 6 < version < 41:
+        raise ValueError(f"version must be in range 6 < version < 41, not: {version=}")
+
+    if version in version_information_coordinates:
+        return version_information_coordinates[version]
+
+    size = calc_qr_size(version)
+    bit_indices = np.arange(18)
+    lines = 5 - bit_indices // 3
+    modules = size - 9 - bit_indices % 3
+
+    rows, columns = np.stack((lines, modules)), np.stack((modules, lines))
+    for array in (rows, columns):
+        array.flags.writeable = False
+    version_information_coordinates[version] = rows, columns
+    return version_information_coordinates[version]
+
+# the conditions work on single indices as well as on whole arrays of indices (see make_mask_patterns)
 masking_conditions = [
     lambda row, column: (row + column) % 2 == 0,
     lambda row, column: row % 2 == 0,
     lambda row, column: column % 3 == 0,
     lambda row, column: (row + column) % 3 == 0,
-    lambda row, column: ( int(row / 2) + int(column / 3) ) % 2 == 0,
+    lambda row, column: ( (row // 2) + (column // 3) ) % 2 == 0,
     lambda row, column: ((row * column) % 2) + ((row * column) % 3) == 0,
     lambda row, column: ( ((row * column) % 2) + ((row * column) % 3) ) % 2 == 0,
     lambda row, column: ( ((row + column) % 2) + ((row * column) % 3) ) % 2 == 0
 ]
 
-evaluation_condition3_pattern = np.array([Module.white, Module.white, Module.white, Module.white, Module.black, Module.white, Module.black, Module.black, Module.black, Module.white, Module.black])
+def make_mask_patterns(size: int) -> np.ndarray:
+    """ 
+    returns all 8 mask patterns for a QR-Code of the given size, as a (8, size, size) bool array (True: toggle the module)
+    """
+    rows, columns = np.indices((size, size))
+    return np.stack([masking_condition(rows, columns) for masking_condition in masking_conditions])
 
 def main():
     # get_size_from_version(...)
@@ -278,12 +530,35 @@ def main():
     assert calculate_character_counter_indicater_pad(1, ModeIndicator.alphanumeric_mode) == 9
     assert calculate_character_counter_indicater_pad(20, ModeIndicator.byte_mode) == 16
 
+    # get_char_id(...)
+    assert get_char_id("A") == 10 and get_char_id(":") == 44 and get_char_id("a") == -1
+
+    # get_char_ids(...)
+    assert get_char_ids("AC-42").tolist() == [10, 12, 41, 4, 2]
+
     # get_qr_code_version(...)
     assert get_qr_code_version(20, ModeIndicator.alphanumeric_mode, ErrorCorrectionLevel.M, minimum_version=10) == 10
     assert get_qr_code_version(2000, ModeIndicator.alphanumeric_mode, ErrorCorrectionLevel.L) == 27
     assert get_qr_code_version(2000, ModeIndicator.numeric_mode, ErrorCorrectionLevel.Q, minimum_version=26) == 28
     assert get_qr_code_version(2000, ModeIndicator.byte_mode, ErrorCorrectionLevel.L) == 33
     assert get_qr_code_version(7089, ModeIndicator.numeric_mode, ErrorCorrectionLevel.L) == 40 # biggest numeric possible
+    assert get_qr_code_version(2953, ModeIndicator.byte_mode, ErrorCorrectionLevel.L) == 40 # biggest byte possible
+    for version_index, version in enumerate(lookup_tables.version_dict):
+        for error_correction_level, character_capacities in version.items():
+            for mode in (ModeIndicator.numeric_mode, ModeIndicator.alphanumeric_mode, ModeIndicator.byte_mode):
+                assert get_qr_code_version(character_capacities[mode.value], mode, error_correction_level) == version_index+1
+    try:
+        get_qr_code_version(7090, ModeIndicator.numeric_mode, ErrorCorrectionLevel.L)
+    except Exception:
+        pass
+    else:
+        raise AssertionError("too much data should raise")
+
+    # get_smallest_version_for_bit_length(...)
+    assert get_smallest_version_for_bit_length(152, ErrorCorrectionLevel.L) == 1
+    assert get_smallest_version_for_bit_length(153, ErrorCorrectionLevel.L) == 2
+    assert get_smallest_version_for_bit_length(153, ErrorCorrectionLevel.L, maximum_version=1) is None
+    assert get_smallest_version_for_bit_length(1, ErrorCorrectionLevel.H, minimum_version=7) == 7
 
     # get_mode_indicator_bits(...)
     # print(get_mode_indicator_bits(ModeIndicator.alphanumeric_mode))
@@ -323,7 +598,7 @@ def main():
     # polynomial_long_division_gf256(...)
     # ...
 
-    # interweave_codewords(...)
+    # get_interleave_permutation(...)
     test_codewords = [
         [
             [
@@ -351,8 +626,41 @@ def main():
     fin = [67, 246, 182, 70, 85, 246, 230, 247, 70, 66, 247, 118, 134, 7, 119, 86, 87, 118, 50, 194, 38, 134, 7, 6, 85, 242, 118, 151, 194, 7, 134, 50, 119, 38, 87, 16, 50, 86, 38, 236, 6, 22, 82, 17, 18, 198, 6, 236, 6, 199, 134, 17, 103, 146, 151, 236, 38, 6, 50, 17, 7, 236]
     fin_err = [213, 87, 148, 235, 199, 204, 116, 159, 11, 96, 177, 5, 45, 60, 212, 173, 115, 202, 76, 24, 247, 182, 133, 147, 241, 124, 75, 59, 223, 157, 242, 33, 229, 200, 238, 106, 248, 134, 76, 40, 154, 27, 195, 255, 117, 129, 230, 172, 154, 209, 189, 82, 111, 17, 10, 2, 86, 163, 108, 131, 161, 163, 240, 32, 111, 120, 192, 178, 39, 133, 141, 236]
 
-    assert interweave_codewords(test_codewords[0]) == fin
-    assert interweave_codewords(test_codewords[1]) == fin_err
+    # version 5 Q: 2 blocks of 15 and 2 blocks of 16 data codewords, 18 error correction codewords per block
+    codewords = np.array([codeword for groups in test_codewords for group in groups for block in group for codeword in block])
+    assert codewords[get_interleave_permutation(5, ErrorCorrectionLevel.Q)].tolist() == fin + fin_err
+    # a single block stays in order
+    assert get_interleave_permutation(1, ErrorCorrectionLevel.L).tolist() == list(range(26))
+    for version in range(1, 41):
+        for error_correction_level in ErrorCorrectionLevel:
+            permutation = get_interleave_permutation(version, error_correction_level)
+            assert sorted(permutation.tolist()) == list(range(len(permutation)))
+
+    # the wrappers around the flat lookup tables
+    for (version, error_correction_level), error_correction_info in lookup_tables.error_correction_table.items():
+        assert get_total_number_codewords(version, error_correction_level) == error_correction_info[0]
+        assert get_error_correction_codewords_per_block(version, error_correction_level) == error_correction_info[1]
+        assert get_blocks_per_group(version, error_correction_level) == error_correction_info[2::2]
+        assert get_codewords_per_block(version, error_correction_level) == error_correction_info[3::2]
+    for version in (1, 9, 10, 26, 27, 40):
+        for mode in (ModeIndicator.numeric_mode, ModeIndicator.alphanumeric_mode, ModeIndicator.byte_mode, ModeIndicator.kanji_mode):
+            assert calculate_character_counter_indicater_pad(version, mode) == lookup_tables.char_count_byte_length_for_version_and_mode[get_size_from_version(version)][mode]
+
+    # the vectorized accessors
+    versions = np.arange(1, 41)
+    assert get_error_correction_infos(versions, ErrorCorrectionLevel.Q).shape == (40, 6)
+    assert get_error_correction_infos([5, 40], [ErrorCorrectionLevel.Q, ErrorCorrectionLevel.L]).tolist() == [list(lookup_tables.error_correction_table[5, ErrorCorrectionLevel.Q]), list(lookup_tables.error_correction_table[40, ErrorCorrectionLevel.L])]
+    for error_correction_level in ErrorCorrectionLevel:
+        assert get_data_bit_capacities(versions, error_correction_level).tolist() == lookup_tables.data_bit_capacities[error_correction_level]
+        assert get_data_bit_capacities(versions, error_correction_level.value).tolist() == lookup_tables.data_bit_capacities[error_correction_level]
+    assert get_character_capacities(40, ErrorCorrectionLevel.L, [ModeIndicator.numeric_mode, ModeIndicator.byte_mode]).tolist() == [7089, 2953]
+    assert get_character_count_indicator_lengths(versions[:, np.newaxis], ModeIndicator.byte_mode).ravel().tolist() == [8]*9 + [16]*31
+    try:
+        get_data_bit_capacities([1, 41], ErrorCorrectionLevel.L)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("a version above 40 should raise")
 
     # get_remainder_bits(...)
     assert get_remainder_bits(40) == 0
@@ -361,9 +669,34 @@ def main():
     # calculate_finder_positions(...)
     assert calculate_finder_positions(17) == ((0, 0), (78, 0), (0, 78))
 
+    # make_mask_patterns(...)
+    mask_patterns = make_mask_patterns(25)
+    for mask_pattern_num, masking_condition in enumerate(masking_conditions):
+        for (row, column), value in np.ndenumerate(mask_patterns[mask_pattern_num]):
+            assert value == masking_condition(row, column)
+
     # get_alignment_positions(...)
     assert get_alignment_positions(2) == get_alignment_positions(2)
 
+    # get_format_information_coordinates(...)
+    rows, columns = get_format_information_coordinates(1)
+    assert rows.shape == columns.shape == (2, 15)
+    assert len(set(zip(rows.ravel().tolist(), columns.ravel().tolist()))) == 30
+    assert (rows[0, 0], columns[0, 0]) == (8, 0) and (rows[0, 14], columns[0, 14]) == (0, 8)
+    assert (rows[1, 0], columns[1, 0]) == (20, 8) and (rows[1, 14], columns[1, 14]) == (8, 20)
+    # the timing patterns and the dark module are left out
+    assert (6, 8) not in zip(rows[0], columns[0]) and (8, 6) not in zip(rows[0], columns[0]) and (13, 8) not in zip(rows[1], columns[1])
+
+    # get_version_information_coordinates(...)
+    rows, columns = get_version_information_coordinates(7)
+    assert rows.shape == columns.shape == (2, 18)
+    assert (rows[0, 0], columns[0, 0]) == (5, 36) and (rows[0, 17], columns[0, 17]) == (0, 34)
+    assert np.array_equal(rows[0], columns[1]) and np.array_equal(columns[0], rows[1])
+
+    # get_format_information_bits(...), get_version_information_bits(...)
+    assert "".join("1" if bit else "0" for bit in get_format_information_bits(ErrorCorrectionLevel.L, 4)) == get_format_information_string(ErrorCorrectionLevel.L, 4)
+    assert "".join("1" if bit else "0" for bit in get_version_information_bits(7)) == get_version_information_string(7)
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file